@@ -0,0 +1,125 @@
+"""Shared helpers for building and seeding benchmark applications."""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from flask import Flask
+from sqlalchemy import event
+
+from bluesea_app import create_app
+from bluesea_app.config import TestConfig
+from bluesea_app.db import db, get_read_engine
+from bluesea_app.models import Post, PostTag, User
+
+BENCH_USERNAME = "bench@bluesea.local"
+BENCH_PASSWORD = "bench-password"
+_TAGS = ("ocean", "reef", "kelp", "whale", "tide", "coral", "plankton", "estuary")
+_SEED_CHUNK = 10_000
+
+
+def make_app(backend: str = "memory", **overrides: Any) -> Flask:
+    """Create an app from :class:`TestConfig`.
+
+    ``backend`` is ``"memory"`` for the in-memory database or ``"file"`` for
+    a temporary SQLite file, which also enables the production engine
+    profile (WAL, PRAGMAs and the read/write split).
+    """
+
+    config = {key: getattr(TestConfig, key) for key in dir(TestConfig) if key.isupper()}
+    workdir = tempfile.mkdtemp(prefix="bluesea-bench-")
+    config.update(
+        SECRET_KEY="bluesea-benchmark-secret-key-not-for-production",
+        JWT_SECRET_KEY="bluesea-benchmark-secret-key-not-for-production",
+        SERVER_NAME="localhost",
+        UPLOAD_FOLDER=os.path.join(workdir, "uploads"),
+        IMPORT_JOB_FOLDER=os.path.join(workdir, "jobs"),
+        IMAGE_DERIVATIVES_ENABLED=False,
+    )
+    if backend == "file":
+        config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    elif backend != "memory":
+        raise ValueError(f"Unknown backend {backend!r}.")
+    config.update(overrides)
+    return create_app(config)
+
+
+def seed_posts(posts: int, user_id: Optional[int] = None) -> int:
+    """Insert ``posts`` synthetic posts with tags and return the author id.
+
+    Rows go in through core ``insert()`` in chunks so that seeding a million
+    posts takes minutes rather than hours. A third of the posts reference a
+    local upload key, a third a remote URL and a third no image.
+    """
+
+    if user_id is None:
+        user = User(email=BENCH_USERNAME)
+        user.set_password(BENCH_PASSWORD)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    start = datetime(2024, 1, 1)
+    for chunk_start in range(1, posts + 1, _SEED_CHUNK):
+        rows: List[Dict[str, Any]] = []
+        tag_rows: List[Dict[str, Any]] = []
+        for index in range(chunk_start, min(posts, chunk_start + _SEED_CHUNK - 1) + 1):
+            tags = list(dict.fromkeys((_TAGS[index % len(_TAGS)], _TAGS[(index * 7) % len(_TAGS)])))
+            digest = f"{index:064x}"
+            if index % 3 == 0:
+                image_path: Optional[str] = f"{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+            elif index % 3 == 1:
+                image_path = f"https://images.example.org/{index}.jpg"
+            else:
+                image_path = None
+            created_at = start + timedelta(seconds=index * 30)
+            rows.append(
+                {
+                    "id": index,
+                    "title": f"Observation {index}: currents near the reef",
+                    "body": "Seagrass and kelp forests along the coast. " * 8,
+                    "source": "community" if index % 2 else "imported",
+                    "tags": json.dumps(tags),
+                    "image_path": image_path,
+                    "image_variants": "webp" if index % 6 == 0 else None,
+                    "content_hash": digest,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                    "user_id": user_id,
+                }
+            )
+            tag_rows.extend(
+                {"post_id": index, "tag": tag, "position": position}
+                for position, tag in enumerate(tags)
+            )
+        db.session.execute(Post.__table__.insert(), rows)
+        db.session.execute(PostTag.__table__.insert(), tag_rows)
+        db.session.commit()
+    return user_id
+
+
+class QueryCounter:
+    """Count SQL statements executed on the writer and read engines."""
+
+    def __init__(self, app: Flask) -> None:
+        with app.app_context():
+            self._engines = [engine for engine in (db.engine, get_read_engine()) if engine is not None]
+        self.count = 0
+
+    def _on_execute(self, *_args: Any) -> None:
+        self.count += 1
+
+    @contextmanager
+    def listening(self) -> Iterator["QueryCounter"]:
+        for engine in self._engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+        try:
+            yield self
+        finally:
+            for engine in self._engines:
+                event.remove(engine, "before_cursor_execute", self._on_execute)
@@ -0,0 +1,270 @@
+"""Endpoint benchmarks: throughput, latency percentiles and SQL query counts.
+
+Run from the ``backend/`` directory::
+
+    python -m benchmarks.endpoints --posts 10000 --backend memory --output bench.json
+    python -m benchmarks.endpoints --posts 10000 --backend file --baseline bench.json
+
+Each endpoint is exercised in-process through the Flask test client, so the
+numbers cover routing, queries, serialization and encoding but no network.
+With ``--baseline``, the run is compared against an earlier ``--output``
+file and the command exits with status 1 when an endpoint regressed beyond
+``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Flask
+from flask.testing import FlaskClient
+
+from .common import BENCH_PASSWORD, BENCH_USERNAME, QueryCounter, make_app, seed_posts
+
+SCHEMA_VERSION = 1
+# Metrics compared against a baseline, and whether higher values are better.
+_COMPARED_METRICS: Dict[str, bool] = {"p95_ms": False, "throughput_rps": True, "queries_per_request": False}
+
+# Settings that must match for a baseline comparison to be meaningful.
+_COMPARABLE_META = ("posts", "backend", "page_size", "import_batch", "response_cache")
+
+# Size of the word pool import bodies are drawn from.
+_FILLER_VOCABULARY = 5000
+
+Scenario = Callable[[int], Tuple[str, Dict[str, Any]]]
+
+
+def _percentile(sorted_samples: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+
+    rank = max(1, math.ceil(percentile / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def _measure(
+    client: FlaskClient,
+    counter: QueryCounter,
+    scenario: Scenario,
+    requests: int,
+    warmup: int,
+    expected_status: int,
+) -> Dict[str, float]:
+    for iteration in range(warmup):
+        method, kwargs = scenario(iteration)
+        client.open(method=method, **kwargs)
+
+    samples: List[float] = []
+    with counter.listening():
+        counter.count = 0
+        started = time.perf_counter()
+        for iteration in range(warmup, warmup + requests):
+            method, kwargs = scenario(iteration)
+            request_started = time.perf_counter()
+            response = client.open(method=method, **kwargs)
+            samples.append((time.perf_counter() - request_started) * 1000)
+            if response.status_code != expected_status:
+                raise RuntimeError(
+                    f"{method} {kwargs.get('path')} returned {response.status_code}: {response.data[:200]!r}"
+                )
+        elapsed = time.perf_counter() - started
+        queries = counter.count
+
+    samples.sort()
+    return {
+        "requests": requests,
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(samples, 50),
+        "p95_ms": _percentile(samples, 95),
+        "p99_ms": _percentile(samples, 99),
+        "queries_per_request": queries / requests,
+    }
+
+
+def _scenarios(client: FlaskClient, posts: int, page_size: int, import_batch: int) -> Dict[str, Tuple[Scenario, int]]:
+    token = client.post(
+        "/api/auth/login", json={"username": BENCH_USERNAME, "password": BENCH_PASSWORD}
+    ).get_json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    pages = max(1, min(posts // page_size, 200))
+    unique = count()
+
+    def list_posts(iteration: int):
+        offset = (iteration % pages) * page_size
+        return "GET", {"path": "/api/posts", "query_string": {"limit": page_size, "offset": offset}}
+
+    def create_post(_iteration: int):
+        number = next(unique)
+        data = {"title": f"Benchmark post {number}", "body": "Tide pools at low water.", "tags": "ocean,tide"}
+        return "POST", {"path": "/api/posts", "data": data, "headers": auth}
+
+    def login(_iteration: int):
+        return "POST", {"path": "/api/auth/login", "json": {"username": BENCH_USERNAME, "password": BENCH_PASSWORD}}
+
+    def import_mock(_iteration: int):
+        number = next(unique)
+        rng = random.Random(number)
+        batch = []
+        for index in range(import_batch):
+            # Varied wording keeps rows apart for the near-duplicate check.
+            filler = " ".join(f"w{rng.randrange(_FILLER_VOCABULARY)}" for _ in range(20))
+            lead = "A pod of whales off the reef" if index % 4 else "Traffic on the highway"
+            batch.append(
+                {"title": f"Imported sighting {number}-{index}", "body": f"{lead}, {filler}.", "tags": ["ocean"]}
+            )
+        return "POST", {"path": "/api/import/mock", "json": {"posts": batch}}
+
+    return {
+        "GET /api/posts": (list_posts, 200),
+        "POST /api/posts": (create_post, 201),
+        "POST /api/auth/login": (login, 200),
+        "POST /api/import/mock": (import_mock, 201),
+    }
+
+
+def run(
+    posts: int,
+    backend: str,
+    requests: int,
+    warmup: int,
+    page_size: int,
+    import_batch: int,
+    cache: bool,
+    endpoints: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Seed a fresh app and benchmark each endpoint, returning the report."""
+
+    overrides: Dict[str, Any] = {}
+    if not cache:
+        overrides["RESPONSE_CACHE_BACKEND"] = "none"
+    app: Flask = make_app(backend, **overrides)
+
+    seed_started = time.perf_counter()
+    with app.app_context():
+        seed_posts(posts)
+    seed_seconds = time.perf_counter() - seed_started
+
+    client = app.test_client()
+    counter = QueryCounter(app)
+    results: Dict[str, Dict[str, float]] = {}
+    for name, (scenario, expected_status) in _scenarios(client, posts, page_size, import_batch).items():
+        if endpoints and name not in endpoints:
+            continue
+        results[name] = _measure(client, counter, scenario, requests, warmup, expected_status)
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "posts": posts,
+            "backend": backend,
+            "requests": requests,
+            "warmup": warmup,
+            "page_size": page_size,
+            "import_batch": import_batch,
+            "response_cache": cache,
+            "seed_seconds": round(seed_seconds, 3),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "endpoints": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a description of every metric that regressed beyond ``tolerance``.
+
+    Latency and throughput may drift by ``tolerance`` (a fraction) before
+    counting as a regression; query counts must not grow at all.
+    """
+
+    regressions: List[str] = []
+    for name, baseline_metrics in baseline.get("endpoints", {}).items():
+        current = report["endpoints"].get(name)
+        if current is None:
+            continue
+        for metric, higher_is_better in _COMPARED_METRICS.items():
+            before, after = baseline_metrics.get(metric), current.get(metric)
+            if before is None or after is None:
+                continue
+            if metric == "queries_per_request":
+                regressed = after > before + 1e-9
+            elif higher_is_better:
+                regressed = after < before * (1 - tolerance)
+            else:
+                regressed = after > before * (1 + tolerance)
+            if regressed:
+                regressions.append(f"{name} {metric}: {before:.3f} -> {after:.3f}")
+    return regressions
+
+
+def _print_table(report: Dict[str, Any]) -> None:
+    meta = report["meta"]
+    print(f"{meta['posts']} posts, {meta['backend']} database, {meta['requests']} requests per endpoint")
+    print(f"{'endpoint':<24}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}")
+    for name, metrics in report["endpoints"].items():
+        print(
+            f"{name:<24}{metrics['throughput_rps']:>10.1f}{metrics['p50_ms']:>10.2f}"
+            f"{metrics['p95_ms']:>10.2f}{metrics['p99_ms']:>10.2f}{metrics['queries_per_request']:>10.2f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=10_000, help="Posts to seed (10k to 1M).")
+    parser.add_argument("--backend", choices=("memory", "file"), default="memory", help="SQLite database kind.")
+    parser.add_argument("--requests", type=int, default=300, help="Timed requests per endpoint.")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per endpoint.")
+    parser.add_argument("--page-size", type=int, default=20, help="Limit for GET /api/posts.")
+    parser.add_argument("--import-batch", type=int, default=50, help="Posts per import request.")
+    parser.add_argument("--cache", action="store_true", help="Keep the response cache enabled.")
+    parser.add_argument("--endpoint", action="append", dest="endpoints", help="Only run this endpoint (repeatable).")
+    parser.add_argument("--output", help="Write the JSON report to this path ('-' for stdout).")
+    parser.add_argument("--baseline", help="Compare against a JSON report from an earlier run.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed latency/throughput drift.")
+    args = parser.parse_args(argv)
+
+    report = run(
+        posts=args.posts,
+        backend=args.backend,
+        requests=args.requests,
+        warmup=args.warmup,
+        page_size=args.page_size,
+        import_batch=args.import_batch,
+        cache=args.cache,
+        endpoints=args.endpoints,
+    )
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        _print_table(report)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as handle:
+                json.dump(report, handle, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        for key in _COMPARABLE_META:
+            if baseline.get("meta", {}).get(key) != report["meta"][key]:
+                print(f"warning: baseline {key} differs ({baseline['meta'].get(key)!r})", file=sys.stderr)
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Measure CPU time per request of ``GET /api/posts`` with each JSON encoder.
+
+Run from the ``backend/`` directory::
+
+    python -m benchmarks.list_serialization --posts 5000 --requests 500
+
+The response cache is disabled so every request queries, serializes and
+encodes a full page. CPU time is measured with :func:`time.process_time`,
+which excludes time spent waiting.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from typing import Dict
+
+from bluesea_app.json_provider import orjson_available
+
+from .common import make_app, seed_posts
+
+
+def run(encoder: str, posts: int, requests: int, limit: int) -> Dict[str, float]:
+    """Return CPU milliseconds per list request for ``encoder``."""
+
+    app = make_app(JSON_ENCODER=encoder, RESPONSE_CACHE_BACKEND="none")
+    with app.app_context():
+        seed_posts(posts)
+
+    client = app.test_client()
+    pages = max(1, posts // limit)
+    for offset in range(0, min(pages, 10) * limit, limit):  # warm up
+        client.get("/api/posts", query_string={"limit": limit, "offset": offset})
+
+    samples = []
+    for index in range(requests):
+        offset = (index % pages) * limit
+        started = time.process_time()
+        response = client.get("/api/posts", query_string={"limit": limit, "offset": offset})
+        samples.append((time.process_time() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+
+    return {
+        "mean_cpu_ms": statistics.fmean(samples),
+        "median_cpu_ms": statistics.median(samples),
+        "p95_cpu_ms": statistics.quantiles(samples, n=20)[-1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=5000, help="Posts to seed.")
+    parser.add_argument("--requests", type=int, default=500, help="Requests to time per encoder.")
+    parser.add_argument("--limit", type=int, default=50, help="Page size.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    encoders = ["stdlib"] + (["orjson"] if orjson_available() else [])
+    results = {encoder: run(encoder, args.posts, args.requests, args.limit) for encoder in encoders}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for encoder, result in results.items():
+        print(
+            f"{encoder:>7}: mean {result['mean_cpu_ms']:.3f} ms"
+            f"  median {result['median_cpu_ms']:.3f} ms"
+            f"  p95 {result['p95_cpu_ms']:.3f} ms CPU per request"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,59 @@
 
 from __future__ import annotations
 
+import mimetypes
 import os
-from typing import Any, Mapping, Optional, Union
+import re
+from typing import Any, List, Mapping, Optional, Union
+from urllib.parse import quote
 
-from flask import Flask, jsonify, send_from_directory
+import click
+from flask import Flask, abort, jsonify, request, send_file
+from flask.cli import AppGroup
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from werkzeug.security import safe_join
 
 from .config import Config
-from .db import db
+from .db import configure_engines, db, prepare_engine_options
+from .json_provider import configure_json_provider
+from .services.cache import init_response_cache
+from .services.compression import init_compression
+from .services.identity import init_identity_cache
+from .services.marine_filter import configure_marine_filter
+from .services.metrics import init_metrics
 
 jwt = JWTManager()
 
 
+class _LazyCommandGroup(AppGroup):
+    """The application's ``flask`` command group, filled on first use.
+
+    The maintenance commands import the models and most services; web
+    workers never look at ``app.cli``, so they skip that import entirely.
+    """
+
+    def __init__(self, app: Flask) -> None:
+        super().__init__(app.name)
+        self._app = app
+        self._loaded = False
+
+    def _load(self) -> None:
+        if not self._loaded:
+            self._loaded = True
+            from .commands import register_commands
+
+            register_commands(self._app)
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        self._load()
+        return super().get_command(ctx, cmd_name)
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        self._load()
+        return super().list_commands(ctx)
+
+
 def _load_config(app: Flask, config_object: Optional[Union[str, Mapping[str, Any]]]) -> None:
     app.config.from_object(Config)
     if not config_object:
@@ -29,17 +69,20 @@ def create_app(config_object: Optional[Union[str, Mapping[str, Any]]] = None) ->
     """Create and configure the Flask application."""
 
     app = Flask(__name__, instance_relative_config=True)
-
-    os.makedirs(app.instance_path, exist_ok=True)
+    app.cli = _LazyCommandGroup(app)
 
     _load_config(app, config_object)
+    configure_json_provider(app)
 
-    upload_folder = app.config.get("UPLOAD_FOLDER")
-    if upload_folder:
-        os.makedirs(upload_folder, exist_ok=True)
-
+    prepare_engine_options(app)
     db.init_app(app)
+    configure_engines(app)
     jwt.init_app(app)
+    init_response_cache(app)
+    init_identity_cache(app)
+    configure_marine_filter(app)
+    init_metrics(app)
+    init_compression(app)
 
     cors_origins = app.config.get("CORS_ORIGINS", ["*"])
     if isinstance(cors_origins, str):
@@ -57,8 +100,10 @@ def create_app(config_object: Optional[Union[str, Mapping[str, Any]]] = None) ->
     register_jwt_handlers()
     register_routes(app)
 
-    with app.app_context():
-        db.create_all()
+    if app.config.get("SCHEMA_AUTO_CREATE"):
+        # Only for throwaway databases; real deployments run ``flask init-db``.
+        with app.app_context():
+            db.create_all()
 
     return app
 
@@ -70,6 +115,12 @@ def register_error_handlers(app: Flask) -> None:
     def handle_not_found(error):  # type: ignore[override]
         return jsonify({"error": "not_found", "message": str(error)}), 404
 
+    @app.errorhandler(413)
+    def handle_payload_too_large(error):  # type: ignore[override]
+        limit = request.max_content_length
+        message = f"Request bodies are limited to {limit} bytes." if limit else str(error)
+        return jsonify({"error": "payload_too_large", "message": message}), 413
+
     @app.errorhandler(500)
     def handle_internal_error(error):  # type: ignore[override]
         return jsonify({"error": "internal_error", "message": str(error)}), 500
@@ -79,17 +130,18 @@ def register_jwt_handlers() -> None:
     """Configure JWT error handlers to return JSON payloads."""
 
     from .models import User
+    from .services.identity import CachedIdentity, load_identity
 
     @jwt.user_identity_loader
     def user_identity_lookup(user: User):
-        return str(user.id) if isinstance(user, User) else str(user)
+        return str(user.id) if isinstance(user, (User, CachedIdentity)) else str(user)
 
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
         identity = jwt_data.get("sub")
         if identity is None:
             return None
-        return User.query.get(int(identity))
+        return load_identity(int(identity))
 
     @jwt.user_lookup_error_loader
     def user_lookup_error_callback(_jwt_header, _jwt_data):
@@ -116,6 +168,23 @@ def register_jwt_handlers() -> None:
         return jsonify({"error": "token_revoked", "message": "The token has been revoked."}), 401
 
 
+_CONTENT_HASH_RE = re.compile(r"^[0-9a-f]{64}(?:_[a-z]+)?$")
+
+
+def _guess_mimetype(filename: str) -> str:
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def _upload_etag(filename: str, path: str) -> str:
+    """Use the content hash embedded in stored names as a strong ETag."""
+
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    if _CONTENT_HASH_RE.match(stem):
+        return stem
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
 def register_routes(app: Flask) -> None:
     """Register blueprints and utility routes for the application."""
 
@@ -123,8 +192,42 @@ def register_routes(app: Flask) -> None:
 
     @app.route("/uploads/<path:filename>")
     def serve_upload(filename: str):
+        """Serve an uploaded file; uploads never change once written.
+
+        Responses are cacheable forever and support conditional and range
+        requests. With ``UPLOADS_OFFLOAD`` set to ``x-accel`` or ``x-sendfile``
+        only headers are returned and the fronting web server sends the bytes.
+        """
+
         upload_folder = app.config.get("UPLOAD_FOLDER")
-        return send_from_directory(upload_folder, filename)
+        path = safe_join(upload_folder, filename) if upload_folder else None
+        if path is None or any(part.startswith(".") for part in filename.split("/")):
+            abort(404)
+        if not os.path.isfile(path):
+            abort(404)
+
+        max_age = int(app.config.get("UPLOADS_MAX_AGE", 31536000))
+        offload = (app.config.get("UPLOADS_OFFLOAD") or "").lower()
+        etag = _upload_etag(filename, path)
+        if offload in ("x-accel", "x-sendfile"):
+            response = app.response_class(mimetype=_guess_mimetype(filename))
+            response.set_etag(etag)
+            response.make_conditional(request)
+            # A matching If-None-Match is answered here; an offload header
+            # would make the web server send the whole file anyway.
+            if response.status_code != 304:
+                if offload == "x-accel":
+                    prefix = app.config.get("UPLOADS_ACCEL_PREFIX", "/_uploads/").rstrip("/")
+                    response.headers["X-Accel-Redirect"] = f"{prefix}/{quote(filename)}"
+                else:
+                    response.headers["X-Sendfile"] = path
+        else:
+            response = send_file(path, conditional=True, etag=etag, max_age=max_age)
+
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        response.cache_control.immutable = True
+        return response
 
     app.register_blueprint(api_bp)
 
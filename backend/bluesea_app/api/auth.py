@@ -15,6 +15,7 @@ from flask_jwt_extended import (
 
 from ..db import db
 from ..models import User
+from ..services.passwords import PasswordHashingBusy
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
@@ -27,6 +28,25 @@ def _json_error(code: str, message: str, status: int):
     return jsonify(payload), status
 
 
+def _busy_error():
+    response, status = _json_error(
+        "server_busy", "The server is busy processing sign-ins. Please retry shortly.", 503
+    )
+    response.headers["Retry-After"] = "1"
+    return response, status
+
+
+def _release_connection() -> None:
+    """Return the session's connection to the pool before hashing a password.
+
+    Hashing takes tens of milliseconds and the production SQLite writer pool
+    holds a single connection; loaded objects keep their attributes and are
+    added back to the session when they need to be saved.
+    """
+
+    db.session.close()
+
+
 def _validate_payload(data: Dict[str, Any]):
     if not isinstance(data, dict):
         return "invalid_payload", "Request payload must be a JSON object."
@@ -67,9 +87,13 @@ def register():
     existing_user = User.query.filter_by(email=username).first()
     if existing_user:
         return _json_error("conflict", "An account with that username already exists.", 409)
+    _release_connection()
 
     user = User(email=username)
-    user.set_password(password)
+    try:
+        user.set_password(password)
+    except PasswordHashingBusy:
+        return _busy_error()
     db.session.add(user)
     db.session.commit()
 
@@ -96,8 +120,16 @@ def login():
     password = data["password"]
 
     user = User.query.filter_by(email=username).first()
-    if not user or not user.check_password(password):
-        return _json_error("invalid_credentials", "Invalid username or password.", 401)
+    _release_connection()
+    try:
+        if not user or not user.check_password(password):
+            return _json_error("invalid_credentials", "Invalid username or password.", 401)
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.add(user)
+            db.session.commit()
+    except PasswordHashingBusy:
+        return _busy_error()
 
     access_token = create_access_token(identity=user)
     response = {
@@ -2,17 +2,39 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Optional
-
-from flask import Blueprint, current_app, jsonify, request
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Callable, Dict, Hashable, Iterator, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from flask import Blueprint, current_app, jsonify, request, url_for
 from flask.typing import ResponseReturnValue
+from werkzeug.exceptions import RequestEntityTooLarge
+from sqlalchemy import insert, select, update
 
 from ..db import db
-from ..models import Post, User
-from ..services import is_marine
+from ..models import ImportJob, Post, PostSimilarityBand, PostTag, User
+from ..services import (
+    StorageError,
+    content_fingerprint,
+    get_process_pool,
+    get_response_cache,
+    is_marine_batch,
+    storage_key,
+    submit_background,
+)
+from ..services.counters import increment_post_counters
+from ..services.relevance import score_posts
+from ..services.similarity import NearDuplicateIndex, Signature, band_rows, post_signature
+from ..services.streaming import StreamRecord, iter_json_array, iter_ndjson
 
 import_bp = Blueprint("import", __name__, url_prefix="/import")
 
+_COPY_BUFFER_SIZE = 64 * 1024
+
 
 def _normalize_tags(raw_tags: Optional[List[str]]) -> List[str]:
     if not raw_tags:
@@ -30,53 +52,258 @@ def _normalize_tags(raw_tags: Optional[List[str]]) -> List[str]:
     return normalized
 
 
-def _collect_candidates(payload: Dict) -> List[Dict]:
-    posts = payload.get("posts")
-    if not isinstance(posts, list):
-        raise ValueError("Payload must include a list of posts under the 'posts' key.")
+def _validate_candidate(item: object, location: str) -> Dict:
+    """Validate a single raw post and return its normalized candidate.
+
+    Raises:
+        ValueError: If the item is not a valid post. ``location`` (for example
+            ``"index 3"`` or ``"line 4"``) is used in the message.
+    """
 
-    candidates: List[Dict] = []
-    for index, item in enumerate(posts):
-        if not isinstance(item, dict):
-            raise ValueError(f"Post at index {index} must be an object.")
+    if not isinstance(item, dict):
+        raise ValueError(f"Post at {location} must be an object.")
 
-        title = item.get("title")
-        body = item.get("body")
-        if not isinstance(title, str) or not title.strip():
-            raise ValueError(f"Post at index {index} is missing a valid title.")
-        if not isinstance(body, str) or not body.strip():
-            raise ValueError(f"Post at index {index} is missing a valid body.")
+    title = item.get("title")
+    body = item.get("body")
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError(f"Post at {location} is missing a valid title.")
+    if not isinstance(body, str) or not body.strip():
+        raise ValueError(f"Post at {location} is missing a valid body.")
 
-        source = item.get("source")
-        if source is not None and not isinstance(source, str):
-            raise ValueError(f"Post at index {index} has an invalid source.")
+    source = item.get("source")
+    if source is not None and not isinstance(source, str):
+        raise ValueError(f"Post at {location} has an invalid source.")
 
-        image_url = item.get("image_url")
-        if image_url is not None and not isinstance(image_url, str):
-            raise ValueError(f"Post at index {index} has an invalid image_url.")
+    image_url = item.get("image_url")
+    if image_url is not None and not isinstance(image_url, str):
+        raise ValueError(f"Post at {location} has an invalid image_url.")
+    try:
+        image_path = storage_key(image_url, current_app.config.get("UPLOAD_FOLDER"))
+    except StorageError:
+        raise ValueError(f"Post at {location} has an image_url outside the upload folder.") from None
+
+    tags_raw = item.get("tags")
+    if tags_raw is not None and not isinstance(tags_raw, list):
+        raise ValueError(f"Post at {location} must declare tags as a list when provided.")
+
+    summary_value = item.get("summary")
+    summary = summary_value.strip() if isinstance(summary_value, str) else ""
+    description_value = item.get("description")
+    description = description_value.strip() if isinstance(description_value, str) else ""
+
+    return {
+        "title": title.strip(),
+        "body": body.strip(),
+        "source": (source or "imported").strip().lower() or "imported",
+        "image_path": image_path,
+        "tags": _normalize_tags(tags_raw),
+        "summary": summary,
+        "description": description,
+    }
 
-        tags_raw = item.get("tags")
-        if tags_raw is not None and not isinstance(tags_raw, list):
-            raise ValueError(f"Post at index {index} must declare tags as a list when provided.")
 
-        summary_value = item.get("summary")
-        summary = summary_value.strip() if isinstance(summary_value, str) else ""
-        description_value = item.get("description")
-        description = description_value.strip() if isinstance(description_value, str) else ""
+def _collect_candidates(payload: Dict) -> List[Dict]:
+    posts = payload.get("posts")
+    if not isinstance(posts, list):
+        raise ValueError("Payload must include a list of posts under the 'posts' key.")
 
-        candidates.append(
+    return [_validate_candidate(item, f"index {index}") for index, item in enumerate(posts)]
+
+
+def _combined_text(candidate: Dict) -> str:
+    return " ".join(
+        part
+        for part in [
+            candidate["title"],
+            candidate["summary"],
+            candidate["description"],
+            candidate["body"],
+            " ".join(candidate["tags"]),
+        ]
+        if part
+    )
+
+
+def _select_marine(candidates: List[Dict], parallel: bool = False) -> List[Dict]:
+    texts = [_combined_text(candidate) for candidate in candidates]
+    executor = None
+    threshold = int(current_app.config.get("IMPORT_PARALLEL_THRESHOLD", 2000))
+    if parallel and len(texts) >= threshold:
+        executor = get_process_pool()
+    flags = is_marine_batch(texts, executor=executor, slice_size=max(1, threshold // 2))
+    return [candidate for candidate, marine in zip(candidates, flags) if marine]
+
+
+class _ImportCounts:
+    """Running totals reported back to import clients."""
+
+    def __init__(self) -> None:
+        self.inserted = 0
+        self.duplicates = 0
+        self.near_duplicates = 0
+        self.skipped = 0
+        self.processed = 0
+        self.error_count = 0
+        self.errors: List[Dict] = []
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "imported": self.inserted,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "nearDuplicates": self.near_duplicates,
+            "skipped": self.skipped,
+        }
+
+
+def _screen_near_duplicates(
+    fresh: Dict[str, Dict], counts: _ImportCounts
+) -> Tuple[Dict[str, Signature], Dict[str, Hashable], Set[str]]:
+    """Find near-duplicates of stored posts and of earlier items in ``fresh``.
+
+    ``fresh`` maps fingerprints to candidates that are not exact duplicates.
+    Returns the signature of every candidate that has one, the post id (or,
+    for an earlier item of the batch, the fingerprint) each near-duplicate
+    matched, and the fingerprints to skip under ``IMPORT_NEAR_DUPLICATES``.
+    """
+
+    signatures: Dict[str, Signature] = {}
+    for fingerprint, candidate in fresh.items():
+        signature = post_signature(candidate["title"], candidate["body"])
+        if signature is not None:
+            signatures[fingerprint] = signature
+
+    mode = (current_app.config.get("IMPORT_NEAR_DUPLICATES") or "skip").lower()
+    matches: Dict[str, Hashable] = {}
+    skipped: Set[str] = set()
+    if mode == "off" or not signatures:
+        return signatures, matches, skipped
+    if mode not in {"skip", "link"}:
+        raise ValueError(f"Unknown IMPORT_NEAR_DUPLICATES '{mode}'.")
+
+    index = NearDuplicateIndex(float(current_app.config.get("IMPORT_NEAR_DUPLICATE_THRESHOLD", 0.7)))
+    index.preload(signatures.values())
+    for fingerprint, signature in signatures.items():
+        match = index.match(signature)
+        if match is not None:
+            counts.near_duplicates += 1
+            if mode == "skip":
+                counts.duplicates += 1
+                skipped.add(fingerprint)
+                continue
+            matches[fingerprint] = match
+        index.add(signature, fingerprint)
+    return signatures, matches, skipped
+
+
+def _bulk_insert(candidates: List[Dict], author_id: int, counts: _ImportCounts) -> None:
+    """Insert ``candidates`` with executemany, skipping known fingerprints.
+
+    Duplicates of existing posts, or of earlier candidates in the same batch,
+    are counted instead of inserted; near-duplicates are skipped or linked
+    as :func:`_screen_near_duplicates` decides. Rows go in through core
+    ``insert()`` in chunks of ``IMPORT_CHUNK_SIZE`` rather than one ORM
+    object per post.
+    """
+
+    chunk_size = max(1, int(current_app.config.get("IMPORT_CHUNK_SIZE", 500)))
+    for start in range(0, len(candidates), chunk_size):
+        chunk = candidates[start : start + chunk_size]
+
+        by_hash: Dict[str, Dict] = {}
+        for candidate in chunk:
+            fingerprint = content_fingerprint(candidate["source"], candidate["title"], candidate["body"])
+            if fingerprint in by_hash:
+                counts.duplicates += 1
+                continue
+            by_hash[fingerprint] = candidate
+
+        existing = set(
+            db.session.execute(
+                select(Post.content_hash).where(Post.content_hash.in_(list(by_hash)))
+            ).scalars()
+        )
+        counts.duplicates += len(existing)
+        fresh = {
+            fingerprint: candidate
+            for fingerprint, candidate in by_hash.items()
+            if fingerprint not in existing
+        }
+        signatures, matches, near_duplicates = _screen_near_duplicates(fresh, counts)
+        linked_posts = {fingerprint: match for fingerprint, match in matches.items() if isinstance(match, int)}
+        accepted = [
+            (fingerprint, candidate)
+            for fingerprint, candidate in fresh.items()
+            if fingerprint not in near_duplicates
+        ]
+        scores = score_posts(
+            [(candidate["title"], candidate["body"], candidate["tags"]) for _, candidate in accepted]
+        )
+        rows = [
             {
-                "title": title.strip(),
-                "body": body.strip(),
-                "source": (source or "imported").strip().lower() or "imported",
-                "image_url": image_url.strip() if isinstance(image_url, str) else None,
-                "tags": _normalize_tags(tags_raw),
-                "summary": summary,
-                "description": description,
+                "title": candidate["title"],
+                "body": candidate["body"],
+                "source": candidate["source"],
+                "tags": json.dumps(candidate["tags"]),
+                "image_path": candidate["image_path"],
+                "content_hash": fingerprint,
+                "minhash": signatures[fingerprint].packed if fingerprint in signatures else None,
+                "duplicate_of_id": linked_posts.get(fingerprint),
+                "relevance": score,
+                "user_id": author_id,
             }
-        )
+            for (fingerprint, candidate), score in zip(accepted, scores)
+        ]
+        if not rows:
+            continue
 
-    return candidates
+        # OR IGNORE covers a concurrent import racing on the unique index.
+        # RETURNING reports only the rows this statement inserted, so the
+        # tags and counters below never cover a post the other import added.
+        table = Post.__table__
+        inserted_ids = dict(
+            db.session.execute(
+                insert(table)
+                .prefix_with("OR IGNORE", dialect="sqlite")
+                .returning(table.c.content_hash, table.c.id),
+                rows,
+            ).all()
+        )
+        counts.inserted += len(inserted_ids)
+        counts.duplicates += len(rows) - len(inserted_ids)
+
+        new_candidates = [
+            (fingerprint, candidate) for fingerprint, candidate in accepted if fingerprint in inserted_ids
+        ]
+        increment_post_counters((candidate["source"], candidate["tags"]) for _, candidate in new_candidates)
+        tag_rows = [
+            {"post_id": inserted_ids[fingerprint], "tag": tag, "position": position}
+            for fingerprint, candidate in new_candidates
+            for position, tag in enumerate(candidate["tags"])
+        ]
+        if tag_rows:
+            db.session.execute(
+                insert(PostTag.__table__).prefix_with("OR IGNORE", dialect="sqlite"), tag_rows
+            )
+        similarity_rows = band_rows(
+            (inserted_ids[fingerprint], signatures[fingerprint])
+            for fingerprint, _ in new_candidates
+            if fingerprint in signatures
+        )
+        if similarity_rows:
+            db.session.execute(
+                insert(PostSimilarityBand.__table__).prefix_with("OR IGNORE", dialect="sqlite"),
+                similarity_rows,
+            )
+        # Near-duplicates of earlier items in this batch can only be linked
+        # once those items have ids.
+        links = [
+            {"id": inserted_ids[fingerprint], "duplicate_of_id": inserted_ids[match]}
+            for fingerprint, match in matches.items()
+            if isinstance(match, str) and fingerprint in inserted_ids and match in inserted_ids
+        ]
+        if links:
+            db.session.execute(update(Post), links)
 
 
 def _determine_author() -> User:
@@ -94,9 +321,185 @@ def _determine_author() -> User:
     return author
 
 
+def _parse_flag(value: str) -> bool:
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _run_import(
+    records: Iterator[StreamRecord],
+    location_label: str,
+    chunk_size: int,
+    parallel: bool = False,
+    on_chunk: Optional[Callable[[_ImportCounts], None]] = None,
+) -> _ImportCounts:
+    """Validate, classify and insert streamed records in bounded chunks.
+
+    Each chunk of ``chunk_size`` valid records is classified and committed
+    before the next one is read, so memory use does not grow with the size of
+    the feed. Invalid records are reported individually (up to
+    ``IMPORT_MAX_REPORTED_ERRORS``) instead of failing the whole import.
+    ``on_chunk`` is called with the running totals after every chunk.
+    """
+
+    max_errors = max(0, int(current_app.config.get("IMPORT_MAX_REPORTED_ERRORS", 100)))
+    counts = _ImportCounts()
+    author_id: Optional[int] = None
+    chunk: List[Dict] = []
+
+    def flush() -> None:
+        nonlocal author_id
+        marine_candidates = _select_marine(chunk, parallel=parallel)
+        counts.skipped += len(chunk) - len(marine_candidates)
+        chunk.clear()
+        if marine_candidates:
+            if author_id is None:
+                author_id = _determine_author().id
+            _bulk_insert(marine_candidates, author_id, counts)
+            db.session.commit()
+        if on_chunk is not None:
+            on_chunk(counts)
+
+    for position, item, error in records:
+        counts.processed += 1
+        if error is None:
+            try:
+                chunk.append(_validate_candidate(item, f"{location_label} {position}"))
+            except ValueError as exc:
+                error = str(exc)
+        if error is not None:
+            counts.error_count += 1
+            if len(counts.errors) < max_errors:
+                counts.errors.append({location_label: position, "message": error})
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    if counts.inserted:
+        get_response_cache().clear()
+    return counts
+
+
+def _import_stream(records: Iterator[StreamRecord], location_label: str) -> ResponseReturnValue:
+    chunk_size = max(1, int(current_app.config.get("IMPORT_CHUNK_SIZE", 500)))
+    counts = _run_import(records, location_label, chunk_size)
+    response = {
+        **counts.as_dict(),
+        "processed": counts.processed,
+        "errorCount": counts.error_count,
+        "errors": counts.errors,
+    }
+    return jsonify(response), 201 if counts.inserted else 200
+
+
+def _job_folder() -> Path:
+    folder = current_app.config.get("IMPORT_JOB_FOLDER") or os.path.join(
+        current_app.instance_path, "import_jobs"
+    )
+    path = Path(folder)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _open_records(job: ImportJob, handle: IO[bytes]) -> Tuple[Iterator[StreamRecord], str]:
+    if job.content_type == "application/x-ndjson":
+        return iter_ndjson(handle), "line"
+    return iter_json_array(handle), "index"
+
+
+def _run_import_job(job_id: str) -> None:
+    """Process a stored import payload; runs on the background job pool."""
+
+    job = db.session.get(ImportJob, job_id)
+    if job is None:
+        return
+    job.status = ImportJob.STATUS_RUNNING
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    def record_progress(counts: _ImportCounts) -> None:
+        job.processed = counts.processed
+        job.inserted = counts.inserted
+        job.duplicates = counts.duplicates
+        job.skipped = counts.skipped
+        job.error_count = counts.error_count
+        job.errors = json.dumps(counts.errors)
+        db.session.commit()
+
+    chunk_size = max(1, int(current_app.config.get("IMPORT_JOB_CHUNK_SIZE", 5000)))
+    try:
+        with open(job.payload_path, "rb") as handle:
+            records, location_label = _open_records(job, handle)
+            counts = _run_import(
+                records, location_label, chunk_size, parallel=True, on_chunk=record_progress
+            )
+        record_progress(counts)
+        job.status = ImportJob.STATUS_SUCCEEDED
+    except Exception as exc:  # pragma: no cover - defensive, reported on the job
+        db.session.rollback()
+        current_app.logger.exception("Import job %s failed", job_id)
+        job = db.session.get(ImportJob, job_id)
+        job.status = ImportJob.STATUS_FAILED
+        job.message = str(exc)
+    finally:
+        try:
+            os.remove(job.payload_path)
+        except OSError:
+            pass
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _enqueue_import_job() -> ResponseReturnValue:
+    """Store the request body on disk and hand it to the background pool.
+
+    A body over the request's size limit is removed again and answered with
+    ``413``.
+    """
+
+    job_id = uuid4().hex
+    payload_path = _job_folder() / f"{job_id}.body"
+    try:
+        with open(payload_path, "wb") as handle:
+            shutil.copyfileobj(request.stream, handle, _COPY_BUFFER_SIZE)
+    except RequestEntityTooLarge:
+        payload_path.unlink(missing_ok=True)
+        raise
+
+    content_type = "application/x-ndjson" if request.mimetype == "application/x-ndjson" else "application/json"
+    job = ImportJob(id=job_id, content_type=content_type, payload_path=str(payload_path))
+    db.session.add(job)
+    db.session.commit()
+
+    submit_background(_run_import_job, job_id)
+
+    response = jsonify({"job": job.to_dict()})
+    response.status_code = 202
+    response.headers["Location"] = url_for("api.import.get_import_job", job_id=job_id)
+    return response
+
+
 @import_bp.post("/mock")
 def import_mock() -> ResponseReturnValue:
-    """Import posts from a mock payload when they relate to marine topics."""
+    """Import posts from a mock payload when they relate to marine topics.
+
+    ``application/x-ndjson`` bodies, and JSON bodies sent with ``?stream=1``,
+    are processed incrementally; see :func:`_run_import`. With ``?async=1``
+    the body is stored and imported by the background job pool, and the
+    response is ``202`` with a job to poll at ``/api/import/jobs/<id>``.
+    Bodies may be up to ``IMPORT_MAX_BODY_SIZE`` bytes rather than the
+    application-wide ``MAX_CONTENT_LENGTH``; raising the limit per request
+    needs Flask 3.1.
+    """
+
+    request.max_content_length = int(current_app.config.get("IMPORT_MAX_BODY_SIZE", 256 * 1024 * 1024))
+    if request.args.get("async", type=_parse_flag):
+        return _enqueue_import_job()
+    if request.mimetype == "application/x-ndjson":
+        return _import_stream(iter_ndjson(request.stream), "line")
+    if request.args.get("stream", type=_parse_flag):
+        return _import_stream(iter_json_array(request.stream), "index")
 
     payload = request.get_json(silent=True)
     if not isinstance(payload, dict):
@@ -110,42 +513,31 @@ def import_mock() -> ResponseReturnValue:
     except ValueError as exc:
         return jsonify({"error": "invalid_payload", "message": str(exc)}), 400
 
-    marine_candidates: List[Dict] = []
-    for candidate in candidates:
-        combined_text = " ".join(
-            part
-            for part in [
-                candidate["title"],
-                candidate["summary"],
-                candidate["description"],
-                candidate["body"],
-                " ".join(candidate["tags"]),
-            ]
-            if part
-        )
-        if is_marine(combined_text):
-            marine_candidates.append(candidate)
+    marine_candidates = _select_marine(candidates)
 
     if not marine_candidates:
         return "", 204
 
-    author = _determine_author()
+    counts = _ImportCounts()
+    counts.skipped = len(candidates) - len(marine_candidates)
+    _bulk_insert(marine_candidates, _determine_author().id, counts)
+    db.session.commit()
 
-    for candidate in marine_candidates:
-        post = Post(
-            title=candidate["title"],
-            body=candidate["body"],
-            source=candidate["source"],
-            author=author,
-        )
-        post.set_tags(candidate["tags"])
-        if candidate["image_url"]:
-            post.image_path = candidate["image_url"]
-        db.session.add(post)
+    if not counts.inserted:
+        return jsonify(counts.as_dict()), 200
 
-    db.session.commit()
+    get_response_cache().clear()
+    return jsonify(counts.as_dict()), 201
+
+
+@import_bp.get("/jobs/<job_id>")
+def get_import_job(job_id: str) -> ResponseReturnValue:
+    """Report the progress of a background import job."""
 
-    return jsonify({"imported": len(marine_candidates)}), 201
+    job = db.session.get(ImportJob, job_id)
+    if job is None:
+        return jsonify({"error": "not_found", "message": "Import job not found."}), 404
+    return jsonify({"job": job.to_dict()})
 
 
-__all__ = ["import_bp", "import_mock"]
+__all__ = ["import_bp", "import_mock", "get_import_job"]
@@ -0,0 +1,21 @@
+"""Prometheus metrics endpoint for the API."""
+
+from flask import Blueprint, current_app, jsonify
+
+from ..services.metrics import get_metrics, render_metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Return request metrics of every worker in Prometheus text format."""
+
+    registry = get_metrics()
+    if registry is None:
+        return jsonify({"error": "metrics_disabled", "message": "Metrics are disabled."}), 404
+    return current_app.response_class(
+        render_metrics(registry.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+        headers={"Cache-Control": "no-store"},
+    )
@@ -2,19 +2,35 @@
 
 from __future__ import annotations
 
+import base64
+import binascii
+import hashlib
 import json
-import os
-from typing import Iterable, List, Optional
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple
 
-from flask import Blueprint, current_app, jsonify, request, url_for
+from flask import Blueprint, Response, current_app, jsonify, request
 from flask_jwt_extended import current_user, jwt_required
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
 
 from ..db import db
-from ..models import Post
-from ..services.storage import StorageError, save_upload
+from ..models import Post, PostSimilarityBand, PostTag, User
+from ..services.cache import CachedResponse, get_response_cache
+from ..services.compression import compress_response
+from ..services.counters import get_post_stats, increment_post_counters
+from ..services.images import schedule_derivatives
+from ..services.relevance import score_posts
+from ..services.search import build_match_query, search_posts
+from ..services.similarity import post_signature
+from ..services.storage import StorageError, save_upload, storage_key
+from .serializers import PostSerializer, serialize_posts
 
 posts_bp = Blueprint("posts", __name__)
 
+# Most posts one multi-get request may ask for.
+_BATCH_LIMIT = 300
+
 
 def _normalize_tags(raw: Optional[Iterable[str] | str]) -> List[str]:
     """Normalize incoming tag values to a deterministic list."""
@@ -55,43 +71,195 @@ def _normalize_tags(raw: Optional[Iterable[str] | str]) -> List[str]:
     return normalized
 
 
-def _serialize_post(post: Post) -> dict:
-    """Convert a :class:`Post` instance into a serializable dictionary."""
+def _encode_cursor(post: Post) -> str:
+    """Build an opaque pagination cursor from a post's ``(created_at, id)`` key."""
 
-    upload_folder = current_app.config.get("UPLOAD_FOLDER")
-    image_url: Optional[str] = None
-    if post.image_path:
-        normalized_path = post.image_path.replace("\\", "/")
-        if normalized_path.lower().startswith(("http://", "https://")):
-            image_url = normalized_path
-        else:
-            filename = normalized_path
-            if upload_folder and os.path.isabs(post.image_path):
-                try:
-                    filename = os.path.relpath(post.image_path, upload_folder)
-                except ValueError:
-                    filename = os.path.basename(post.image_path)
-            image_url = url_for("serve_upload", filename=filename, _external=True)
-
-    author = None
-    if post.author:
-        author = {
-            "id": post.author.id,
-            "username": post.author.email,
-            "is_admin": post.author.is_admin,
+    raw = f"{post.created_at.isoformat()}|{post.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by :func:`_encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_at_raw, post_id_raw = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at_raw), int(post_id_raw)
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise ValueError("Invalid pagination cursor.") from exc
+
+
+def _encode_relevance_cursor(post: Post) -> str:
+    """Build an opaque pagination cursor from a post's ``(relevance, id)`` key."""
+
+    relevance = "" if post.relevance is None else repr(post.relevance)
+    raw = f"{relevance}|{post.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_relevance_cursor(cursor: str) -> Tuple[Optional[float], int]:
+    """Decode a cursor produced by :func:`_encode_relevance_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        relevance_raw, post_id_raw = raw.rsplit("|", 1)
+        return (float(relevance_raw) if relevance_raw else None), int(post_id_raw)
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise ValueError("Invalid pagination cursor.") from exc
+
+
+def _encode_search_cursor(rank: float, post_id: int) -> str:
+    """Build an opaque pagination cursor from a search hit's ``(rank, id)`` key."""
+
+    raw = f"{rank!r}|{post_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode a cursor produced by :func:`_encode_search_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        rank_raw, post_id_raw = raw.rsplit("|", 1)
+        return float(rank_raw), int(post_id_raw)
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise ValueError("Invalid pagination cursor.") from exc
+
+
+def _after_cursor(query, cursor_key: Tuple[datetime, int]):
+    """Restrict ``query`` to posts that sort after ``cursor_key``, newest first."""
+
+    cursor_created_at, cursor_id = cursor_key
+    return query.filter(
+        or_(
+            Post.created_at < cursor_created_at,
+            and_(Post.created_at == cursor_created_at, Post.id < cursor_id),
+        )
+    )
+
+
+def _parse_ids(raw: Iterable[object]) -> List[int]:
+    """Validate requested post ids, dropping repeats but keeping their order.
+
+    Raises:
+        ValueError: If an id is not a positive integer or too many are given.
+    """
+
+    ids: List[int] = []
+    seen = set()
+    for value in raw:
+        if isinstance(value, bool):
+            raise ValueError("Post ids must be positive integers.")
+        try:
+            post_id = int(str(value).strip())
+        except ValueError as exc:
+            raise ValueError("Post ids must be positive integers.") from exc
+        if post_id < 1:
+            raise ValueError("Post ids must be positive integers.")
+        if post_id not in seen:
+            seen.add(post_id)
+            ids.append(post_id)
+    if not ids:
+        raise ValueError("At least one post id is required.")
+    if len(ids) > _BATCH_LIMIT:
+        raise ValueError(f"At most {_BATCH_LIMIT} post ids can be requested at once.")
+    return ids
+
+
+def _batch_response(ids: List[int]) -> Response:
+    """Serve the posts in ``ids`` from one ``IN`` query, in the requested order."""
+
+    def build() -> Tuple[dict, int]:
+        posts = {post.id: post for post in _post_query().filter(Post.id.in_(ids)).all()}
+        serializer = PostSerializer()
+        payload = {
+            "items": [serializer.serialize(posts[post_id]) for post_id in ids if post_id in posts],
+            "missing": [post_id for post_id in ids if post_id not in posts],
         }
+        return payload, 200
 
-    return {
-        "id": post.id,
-        "title": post.title,
-        "body": post.body,
-        "source": post.source,
-        "tags": post.get_tags(),
-        "image_url": image_url,
-        "created_at": post.created_at.isoformat() if post.created_at else None,
-        "updated_at": post.updated_at.isoformat() if post.updated_at else None,
-        "user": author,
-    }
+    return _cached_json_response(f"posts:batch:{','.join(map(str, ids))}", build)
+
+
+def _after_relevance_cursor(query, cursor_key: Tuple[Optional[float], int]):
+    """Restrict ``query`` to posts that sort after ``cursor_key``, most relevant first.
+
+    Unscored posts (``NULL`` relevance) sort after every scored post.
+    """
+
+    cursor_relevance, cursor_id = cursor_key
+    if cursor_relevance is None:
+        return query.filter(Post.relevance.is_(None), Post.id < cursor_id)
+    return query.filter(
+        or_(
+            Post.relevance < cursor_relevance,
+            and_(Post.relevance == cursor_relevance, Post.id < cursor_id),
+            Post.relevance.is_(None),
+        )
+    )
+
+
+def _post_query():
+    """Return a ``Post`` query that loads authors in the same round trip."""
+
+    return Post.query.options(joinedload(Post.author))
+
+
+def _cached_json_response(key: str, build: Callable[[], Tuple[dict, int]]) -> Response:
+    """Serve ``key`` from the response cache, building and storing it on a miss.
+
+    ``build`` returns a payload and status code; only ``200`` payloads are
+    cached. Responses carry a strong ETag so that a matching
+    ``If-None-Match`` yields ``304`` straight from the cache, and compressed
+    bodies are cached next to the entry, one per content encoding. Keys are
+    scoped to ``request.host_url``: payloads hold absolute image URLs, which
+    differ per host and scheme.
+    """
+
+    key = f"{request.host_url}|{key}"
+    cache = get_response_cache()
+    entry = cache.get(key)
+    cache_status = "HIT"
+    if entry is None:
+        cache_status = "MISS"
+        payload, status = build()
+        if status != 200:
+            return jsonify(payload), status
+        rendered = current_app.json.response(payload)
+        body = rendered.get_data()
+        entry = CachedResponse(
+            body=body,
+            etag=hashlib.sha256(body).hexdigest()[:32],
+            mimetype=rendered.mimetype,
+        )
+        cache.set(key, entry)
+
+    response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+    response.set_etag(entry.etag)
+    response.headers["X-Cache"] = cache_status
+    compress_response(response, cache, key)
+    return response.make_conditional(request)
+
+
+def _invalidate_post_cache() -> None:
+    """Drop cached post responses after posts have been written."""
+
+    get_response_cache().clear()
 
 
 @posts_bp.post("/posts")
@@ -116,8 +284,14 @@ def create_post():
         tags_input = single_tag if single_tag is not None else []
     tags = _normalize_tags(tags_input)
 
-    post = Post(title=title, body=body, source=source, author=current_user)
+    # current_user is a cached identity, not an ORM instance; link by id.
+    post = Post(title=title, body=body, source=source, user_id=current_user.id)
     post.set_tags(tags)
+    post.relevance = score_posts([(title, body, tags)])[0]
+    signature = post_signature(title, body)
+    if signature is not None:
+        post.minhash = signature.packed
+        post.similarity_bands = [PostSimilarityBand(value=value) for value in set(signature.bands)]
 
     upload_folder = current_app.config.get("UPLOAD_FOLDER")
     image = request.files.get("image")
@@ -126,57 +300,230 @@ def create_post():
             saved_path = save_upload(image, upload_folder)
         except StorageError as exc:
             return jsonify({"error": "upload_failed", "message": str(exc)}), 400
-        relative_path = saved_path
-        if upload_folder:
-            try:
-                relative_path = os.path.relpath(saved_path, upload_folder)
-            except ValueError:
-                relative_path = os.path.basename(saved_path)
-        post.image_path = relative_path.replace("\\", "/")
+        post.image_path = storage_key(saved_path, upload_folder)
 
     db.session.add(post)
+    increment_post_counters([(post.source, tags)])
     db.session.commit()
+    _invalidate_post_cache()
+    if post.image_path:
+        schedule_derivatives(post.image_path)
 
-    return jsonify({"post": _serialize_post(post)}), 201
+    return jsonify({"post": PostSerializer().serialize(post, author=current_user)}), 201
 
 
 @posts_bp.get("/posts")
 def list_posts():
-    """Return a paginated list of posts."""
+    """Return a paginated list of posts.
+
+    Clients may page either with ``offset`` or with the opaque ``cursor``
+    returned as ``nextCursor``. Cursor pages seek directly to the
+    ``(created_at, id)`` key instead of skipping rows, so every page costs the
+    same and stays stable while new posts arrive.
+
+    ``sort=relevance`` orders posts by their stored marine relevance score
+    instead of recency; cursors then seek on ``(relevance, id)``.
+
+    With ``ids=1,2,3`` the listing is replaced by a multi-get of those posts,
+    answered like ``POST /posts/batch``.
+    """
 
-    source = request.args.get("source")
+    ids_param = request.args.get("ids")
+    if ids_param is not None:
+        try:
+            ids = _parse_ids(ids_param.split(","))
+        except ValueError as exc:
+            return jsonify({"error": "invalid_ids", "message": str(exc)}), 400
+        return _batch_response(ids)
+
+    source_param = request.args.get("source")
+    source = source_param.strip().lower() if source_param else None
+    tag_param = request.args.get("tag")
+    tag = tag_param.strip().lower() if tag_param else None
+    sort = (request.args.get("sort") or "recent").strip().lower()
+    if sort not in {"recent", "relevance"}:
+        return jsonify({"error": "invalid_sort", "message": "Sort must be 'recent' or 'relevance'."}), 400
+    by_relevance = sort == "relevance"
+    cursor = request.args.get("cursor") or None
     limit_param = request.args.get("limit", type=int)
     offset_param = request.args.get("offset", type=int)
 
     limit = 20 if limit_param is None else max(1, min(limit_param, 50))
-    offset = 0 if offset_param is None else max(0, offset_param)
-
-    query = Post.query.order_by(Post.created_at.desc())
-    if source:
-        query = query.filter(Post.source == source.strip().lower())
-
-    items = query.offset(offset).limit(limit + 1).all()
-    has_more = len(items) > limit
-    posts = items[:limit]
+    offset = 0 if offset_param is None or cursor else max(0, offset_param)
 
-    next_offset = offset + len(posts) if has_more else None
+    cursor_key: Optional[Tuple[object, int]] = None
+    if cursor:
+        try:
+            cursor_key = _decode_relevance_cursor(cursor) if by_relevance else _decode_cursor(cursor)
+        except ValueError as exc:
+            return jsonify({"error": "invalid_cursor", "message": str(exc)}), 400
 
-    return jsonify(
-        {
-            "items": [_serialize_post(post) for post in posts],
+    def build() -> Tuple[dict, int]:
+        if by_relevance:
+            query = _post_query().order_by(Post.relevance.desc(), Post.id.desc())
+        else:
+            query = _post_query().order_by(Post.created_at.desc(), Post.id.desc())
+        if source:
+            query = query.filter(Post.source == source)
+        if tag:
+            query = query.join(PostTag, PostTag.post_id == Post.id).filter(PostTag.tag == tag)
+
+        if cursor_key is not None:
+            query = (_after_relevance_cursor if by_relevance else _after_cursor)(query, cursor_key)
+        elif offset:
+            query = query.offset(offset)
+
+        items = query.limit(limit + 1).all()
+        has_more = len(items) > limit
+        posts = items[:limit]
+
+        next_offset = offset + len(posts) if has_more and cursor_key is None else None
+        encode_cursor = _encode_relevance_cursor if by_relevance else _encode_cursor
+        next_cursor = encode_cursor(posts[-1]) if has_more else None
+
+        payload = {
+            "items": serialize_posts(posts),
             "nextOffset": next_offset,
+            "nextCursor": next_cursor,
             "limit": limit,
             "offset": offset,
         }
-    )
+        return payload, 200
+
+    cache_key = f"posts:list:{sort}:{source or ''}:{tag or ''}:{limit}:{offset}:{cursor or ''}"
+    return _cached_json_response(cache_key, build)
+
+
+@posts_bp.get("/users/<int:user_id>/posts")
+def list_user_posts(user_id: int):
+    """Return one user's posts, newest first, paged with ``nextCursor``.
+
+    Pages seek on the ``(user_id, created_at, id)`` index, so the cost of a
+    page does not depend on how many posts the user has.
+    """
+
+    limit_param = request.args.get("limit", type=int)
+    limit = 20 if limit_param is None else max(1, min(limit_param, 50))
+    cursor = request.args.get("cursor") or None
+
+    cursor_key: Optional[Tuple[datetime, int]] = None
+    if cursor:
+        try:
+            cursor_key = _decode_cursor(cursor)
+        except ValueError as exc:
+            return jsonify({"error": "invalid_cursor", "message": str(exc)}), 400
+
+    def build() -> Tuple[dict, int]:
+        author = db.session.get(User, user_id)
+        if author is None:
+            return {"error": "user_not_found", "message": "User not found."}, 404
+
+        query = author.posts.order_by(Post.created_at.desc(), Post.id.desc())
+        if cursor_key is not None:
+            query = _after_cursor(query, cursor_key)
+        items = query.limit(limit + 1).all()
+        has_more = len(items) > limit
+        posts = items[:limit]
+
+        serializer = PostSerializer()
+        payload = {
+            "items": [serializer.serialize(post, author=author) for post in posts],
+            "nextCursor": _encode_cursor(posts[-1]) if has_more else None,
+            "limit": limit,
+        }
+        return payload, 200
+
+    return _cached_json_response(f"posts:user:{user_id}:{limit}:{cursor or ''}", build)
+
+
+@posts_bp.get("/posts/search")
+def search():
+    """Full-text search over post titles, bodies and tags.
+
+    Results are ordered by BM25 relevance and paged with the opaque
+    ``nextCursor``. Each item carries HTML-escaped ``highlight`` fragments in
+    which matched terms are wrapped in ``<mark>`` tags.
+    """
+
+    if db.engine.dialect.name != "sqlite":
+        return jsonify({"error": "search_unavailable", "message": "Search requires SQLite FTS5."}), 501
+
+    match_query = build_match_query(request.args.get("q"))
+    if match_query is None:
+        return jsonify({"error": "query_required", "message": "A search query is required."}), 400
+
+    limit_param = request.args.get("limit", type=int)
+    limit = 20 if limit_param is None else max(1, min(limit_param, 50))
+
+    after: Optional[Tuple[float, int]] = None
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            after = _decode_search_cursor(cursor)
+        except ValueError as exc:
+            return jsonify({"error": "invalid_cursor", "message": str(exc)}), 400
+
+    hits = search_posts(match_query, limit + 1, after)
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+
+    posts_by_id = {
+        post.id: post
+        for post in _post_query().filter(Post.id.in_([hit.post_id for hit in hits])).all()
+    }
+    serializer = PostSerializer()
+    items = []
+    for hit in hits:
+        post = posts_by_id.get(hit.post_id)
+        if post is None:
+            continue
+        item = serializer.serialize(post)
+        item["highlight"] = {"title": hit.title_highlight, "body": hit.snippet}
+        items.append(item)
+
+    next_cursor = _encode_search_cursor(hits[-1].rank, hits[-1].post_id) if has_more else None
+    return jsonify({"items": items, "nextCursor": next_cursor, "limit": limit})
+
+
+@posts_bp.get("/posts/stats")
+def post_stats():
+    """Return the number of posts overall, per source and per tag.
+
+    Counts come from the ``post_counters`` table, which every insert updates
+    in the same transaction, so this never scans the posts themselves.
+    """
+
+    return _cached_json_response("posts:stats", lambda: (get_post_stats(), 200))
+
+
+@posts_bp.post("/posts/batch")
+def get_posts_batch():
+    """Return several posts by id, given as a JSON ``{"ids": [...]}`` body.
+
+    Items keep the order of the requested ids; ids without a post are listed
+    under ``missing``. Up to ``_BATCH_LIMIT`` ids are fetched in one query,
+    authors included.
+    """
+
+    payload = request.get_json(silent=True) or {}
+    raw_ids = payload.get("ids") if isinstance(payload, dict) else None
+    if not isinstance(raw_ids, list):
+        return jsonify({"error": "invalid_ids", "message": "Expected a JSON body with an 'ids' list."}), 400
+    try:
+        ids = _parse_ids(raw_ids)
+    except ValueError as exc:
+        return jsonify({"error": "invalid_ids", "message": str(exc)}), 400
+    return _batch_response(ids)
 
 
 @posts_bp.get("/posts/<int:post_id>")
 def get_post(post_id: int):
     """Return a single post by its identifier."""
 
-    post = Post.query.get(post_id)
-    if not post:
-        return jsonify({"error": "not_found", "message": "Post not found."}), 404
+    def build() -> Tuple[dict, int]:
+        post = _post_query().filter(Post.id == post_id).first()
+        if not post:
+            return {"error": "not_found", "message": "Post not found."}, 404
+        return {"post": PostSerializer().serialize(post)}, 200
 
-    return jsonify({"post": _serialize_post(post)})
+    return _cached_json_response(f"posts:detail:{post_id}", build)
@@ -0,0 +1,98 @@
+"""JSON-ready representations of API resources."""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Union
+from urllib.parse import quote
+
+from flask import url_for
+
+from ..models import Post, User
+from ..services.identity import CachedIdentity
+from ..services.images import VARIANT_SIZES, derivative_relative_path
+from ..services.storage import is_remote_key
+
+__all__ = ["PostSerializer", "serialize_posts"]
+
+_URL_SAFE = "/:@!$&'()*+,;="
+
+
+class PostSerializer:
+    """Serialize posts while resolving per-request state only once.
+
+    ``Post.image_path`` holds the canonical storage key computed at write
+    time (see :func:`~bluesea_app.services.storage.storage_key`), so image
+    URLs are a prefix plus the quoted key. The prefix comes from a single
+    ``url_for`` call and author payloads are cached by id, so serializing a
+    page costs the same per row regardless of how many share an author.
+    """
+
+    def __init__(self) -> None:
+        self._upload_url_prefix: Optional[str] = None
+        self._authors: Dict[int, dict] = {}
+
+    def _upload_url(self, key: str) -> str:
+        if self._upload_url_prefix is None:
+            probe = url_for("serve_upload", filename="_", _external=True)
+            self._upload_url_prefix = probe[:-1]
+        return self._upload_url_prefix + quote(key, safe=_URL_SAFE)
+
+    def image_url(self, key: Optional[str]) -> Optional[str]:
+        if not key:
+            return None
+        if is_remote_key(key):
+            return key
+        return self._upload_url(key)
+
+    def image_variants(self, post: Post) -> Optional[Dict[str, str]]:
+        if not post.image_path or not post.image_variants:
+            return None
+        return {
+            variant: self._upload_url(
+                derivative_relative_path(post.image_path, variant, post.image_variants)
+            )
+            for variant in VARIANT_SIZES
+        }
+
+    def author(self, user: Optional[Union[User, CachedIdentity]]) -> Optional[dict]:
+        if user is None:
+            return None
+        payload = self._authors.get(user.id)
+        if payload is None:
+            payload = {
+                "id": user.id,
+                "username": user.email,
+                "is_admin": user.is_admin,
+            }
+            self._authors[user.id] = payload
+        return payload
+
+    def serialize(self, post: Post, author: Optional[Union[User, CachedIdentity]] = None) -> dict:
+        created_at = post.created_at
+        updated_at = post.updated_at
+        return {
+            "id": post.id,
+            "title": post.title,
+            "body": post.body,
+            "source": post.source,
+            "tags": [entry.tag for entry in post.tag_entries],
+            "image_url": self.image_url(post.image_path),
+            "image_variants": self.image_variants(post),
+            "duplicate_of": post.duplicate_of_id,
+            "created_at": created_at.isoformat() if created_at else None,
+            "updated_at": updated_at.isoformat() if updated_at else None,
+            "user": self.author(author if author is not None else post.author),
+        }
+
+    def serialize_many(self, posts: Iterable[Post]) -> List[dict]:
+        serialize = self.serialize
+        return [serialize(post) for post in posts]
+
+
+def serialize_posts(posts: Iterable[Post]) -> List[dict]:
+    """Convert a batch of :class:`Post` instances into serializable dictionaries.
+
+    Authors should be eagerly loaded to avoid one lazy ``SELECT`` per post.
+    """
+
+    return PostSerializer().serialize_many(posts)
@@ -0,0 +1,331 @@
+"""Maintenance commands exposed through the ``flask`` command line."""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import click
+from flask import Flask, current_app
+from sqlalchemy import insert, select, update
+
+from .db import db
+from .models import ImportJob, Post, PostSimilarityBand, PostTag
+from .schema import (
+    backfill_content_hashes,
+    backfill_post_tags,
+    init_database,
+    pending_schema_changes,
+)
+from .services.counters import reconcile_post_counters
+from .services.images import derivatives_available, generate_derivatives, is_local_image
+from .services.relevance import score_posts
+from .services.search import rebuild_search_index
+from .services.similarity import band_rows, post_signature
+from .services.storage import StorageError, storage_key
+
+
+def backfill_image_derivatives(upload_folder: str, webp: bool, chunk_size: int = 100) -> int:
+    """Generate missing variants for every local image referenced by a post.
+
+    Images are processed in chunks of distinct ``image_path`` values and each
+    chunk's posts are updated in one statement. Returns the number of images
+    processed; images that cannot be read are skipped.
+    """
+
+    last_path = ""
+    processed = 0
+    while True:
+        paths = db.session.execute(
+            select(Post.image_path)
+            .where(Post.image_variants.is_(None), Post.image_path > last_path)
+            .group_by(Post.image_path)
+            .order_by(Post.image_path)
+            .limit(chunk_size)
+        ).scalars().all()
+        if not paths:
+            break
+        last_path = paths[-1]
+
+        for path in paths:
+            if not is_local_image(path):
+                continue
+            try:
+                extension = generate_derivatives(upload_folder, path, webp)
+            except (OSError, ValueError, StorageError) as exc:
+                current_app.logger.warning("Skipping derivatives for %s: %s", path, exc)
+                continue
+            db.session.execute(
+                update(Post).where(Post.image_path == path).values(image_variants=extension)
+            )
+            processed += 1
+        db.session.commit()
+
+    return processed
+
+
+def normalize_image_paths(upload_folder: str, chunk_size: int = 500) -> int:
+    """Rewrite ``posts.image_path`` values into canonical storage keys.
+
+    Rows written before keys were computed at write time may hold absolute
+    paths or backslashes. Posts are walked in primary key order and only rows
+    whose key changes are updated; paths outside ``upload_folder`` are left
+    alone and logged. Returns the number of posts rewritten.
+    """
+
+    last_id = 0
+    rewritten = 0
+    while True:
+        rows = db.session.execute(
+            select(Post.id, Post.image_path)
+            .where(Post.id > last_id, Post.image_path.is_not(None))
+            .order_by(Post.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        changes = []
+        for post_id, image_path in rows:
+            try:
+                key = storage_key(image_path, upload_folder)
+            except StorageError as exc:
+                current_app.logger.warning("Skipping image path of post %s: %s", post_id, exc)
+                continue
+            if key != image_path:
+                changes.append({"id": post_id, "image_path": key})
+        if changes:
+            db.session.execute(update(Post), changes)
+            rewritten += len(changes)
+        db.session.commit()
+        last_id = rows[-1][0]
+
+    return rewritten
+
+
+def backfill_similarity_signatures(chunk_size: int = 500) -> int:
+    """Compute near-duplicate signatures for posts stored without one.
+
+    Posts are walked in primary key order in chunks of ``chunk_size``; posts
+    whose text has no words keep an empty signature. Returns the number of
+    posts that received a signature.
+    """
+
+    last_id = 0
+    backfilled = 0
+    while True:
+        rows = db.session.execute(
+            select(Post.id, Post.title, Post.body)
+            .where(Post.id > last_id, Post.minhash.is_(None))
+            .order_by(Post.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        signatures = [
+            (post_id, signature)
+            for post_id, title, body in rows
+            if (signature := post_signature(title, body)) is not None
+        ]
+        if signatures:
+            db.session.execute(
+                update(Post), [{"id": post_id, "minhash": signature.packed} for post_id, signature in signatures]
+            )
+            db.session.execute(
+                insert(PostSimilarityBand.__table__).prefix_with("OR IGNORE", dialect="sqlite"),
+                band_rows(signatures),
+            )
+            backfilled += len(signatures)
+        db.session.commit()
+        last_id = rows[-1][0]
+
+    return backfilled
+
+
+def backfill_relevance_scores(rescore: bool = False, chunk_size: int = 1000) -> int:
+    """Store marine relevance scores for posts, one chunk per transaction.
+
+    Only unscored posts are touched unless ``rescore`` is set, which is
+    useful after the keyword list changed. Each chunk is scored in a single
+    vectorized batch. Returns the number of posts scored.
+    """
+
+    last_id = 0
+    scored = 0
+    while True:
+        statement = select(Post.id, Post.title, Post.body).where(Post.id > last_id)
+        if not rescore:
+            statement = statement.where(Post.relevance.is_(None))
+        rows = db.session.execute(statement.order_by(Post.id).limit(chunk_size)).all()
+        if not rows:
+            break
+
+        tags: Dict[int, List[str]] = {}
+        for post_id, tag in db.session.execute(
+            select(PostTag.post_id, PostTag.tag)
+            .where(PostTag.post_id.in_([row[0] for row in rows]))
+            .order_by(PostTag.post_id, PostTag.position)
+        ):
+            tags.setdefault(post_id, []).append(tag)
+        scores = score_posts([(title, body, tags.get(post_id, [])) for post_id, title, body in rows])
+        db.session.execute(
+            update(Post),
+            [{"id": row[0], "relevance": score} for row, score in zip(rows, scores)],
+        )
+        db.session.commit()
+        scored += len(rows)
+        last_id = rows[-1][0]
+
+    return scored
+
+
+def fail_stale_import_jobs(older_than: timedelta = timedelta(0)) -> int:
+    """Mark unfinished import jobs created more than ``older_than`` ago as failed.
+
+    Jobs run on a thread pool inside the web workers, so a job that was
+    queued or running when its worker stopped is never resumed. Their stored
+    payloads are deleted. Returns the number of jobs marked failed.
+    """
+
+    now = datetime.utcnow()
+    jobs = ImportJob.query.filter(
+        ImportJob.status.in_([ImportJob.STATUS_QUEUED, ImportJob.STATUS_RUNNING]),
+        ImportJob.created_at <= now - older_than,
+    ).all()
+    for job in jobs:
+        job.status = ImportJob.STATUS_FAILED
+        job.message = "The job was interrupted by a server restart; submit the import again."
+        job.finished_at = now
+        try:
+            os.remove(job.payload_path)
+        except OSError:
+            pass
+    db.session.commit()
+    return len(jobs)
+
+
+def _require_schema() -> None:
+    with db.engine.connect() as connection:
+        pending = pending_schema_changes(connection)
+    if pending:
+        raise click.ClickException(
+            f"The database schema is out of date (missing {', '.join(pending)}); run `flask init-db` first."
+        )
+
+
+def register_commands(app: Flask) -> None:
+    """Attach the maintenance commands to the application's CLI."""
+
+    @app.cli.command("init-db")
+    def init_db_command() -> None:
+        """Create directories and tables, and add missing columns and indexes."""
+
+        changes = init_database(app)
+        for change in changes:
+            click.echo(change)
+        click.echo(f"Database ready ({len(changes)} changes).")
+
+    @app.cli.command("backfill-tags")
+    @click.option("--chunk-size", default=500, show_default=True, help="Posts per transaction.")
+    def backfill_tags_command(chunk_size: int) -> None:
+        """Copy legacy JSON tags into the indexed post_tags table."""
+
+        _require_schema()
+        count = backfill_post_tags(chunk_size=chunk_size)
+        click.echo(f"Backfilled tags for {count} posts.")
+
+    @app.cli.command("backfill-content-hash")
+    @click.option("--chunk-size", default=500, show_default=True, help="Posts per transaction.")
+    def backfill_content_hash_command(chunk_size: int) -> None:
+        """Fingerprint posts stored without a content hash so imports skip their duplicates."""
+
+        _require_schema()
+        count = backfill_content_hashes(chunk_size=chunk_size)
+        click.echo(f"Fingerprinted {count} posts.")
+
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index_command() -> None:
+        """Create the full-text search index and repopulate it from posts."""
+
+        _require_schema()
+        rebuild_search_index()
+        click.echo("Search index rebuilt.")
+
+    @app.cli.command("backfill-image-derivatives")
+    @click.option("--chunk-size", default=100, show_default=True, help="Images per transaction.")
+    def backfill_image_derivatives_command(chunk_size: int) -> None:
+        """Generate thumbnail, feed and full-size variants for existing uploads."""
+
+        if not derivatives_available():
+            raise click.ClickException("Pillow is required to generate image derivatives.")
+        _require_schema()
+        count = backfill_image_derivatives(
+            app.config["UPLOAD_FOLDER"],
+            bool(app.config.get("IMAGE_DERIVATIVE_WEBP", True)),
+            chunk_size=chunk_size,
+        )
+        click.echo(f"Generated derivatives for {count} images.")
+
+    @app.cli.command("reconcile-counters")
+    def reconcile_counters_command() -> None:
+        """Rebuild the per-source and per-tag post counters from scratch."""
+
+        _require_schema()
+        count = reconcile_post_counters()
+        click.echo(f"Rebuilt {count} post counters.")
+
+    @app.cli.command("backfill-similarity")
+    @click.option("--chunk-size", default=500, show_default=True, help="Posts per transaction.")
+    def backfill_similarity_command(chunk_size: int) -> None:
+        """Compute near-duplicate signatures for posts that lack one."""
+
+        _require_schema()
+        count = backfill_similarity_signatures(chunk_size=chunk_size)
+        click.echo(f"Computed similarity signatures for {count} posts.")
+
+    @app.cli.command("backfill-relevance")
+    @click.option("--chunk-size", default=1000, show_default=True, help="Posts per transaction.")
+    @click.option("--all", "rescore", is_flag=True, help="Rescore posts that already have a score.")
+    def backfill_relevance_command(chunk_size: int, rescore: bool) -> None:
+        """Compute marine relevance scores for existing posts."""
+
+        _require_schema()
+        count = backfill_relevance_scores(rescore=rescore, chunk_size=chunk_size)
+        click.echo(f"Scored {count} posts.")
+
+    @app.cli.command("normalize-image-paths")
+    @click.option("--chunk-size", default=500, show_default=True, help="Posts per transaction.")
+    def normalize_image_paths_command(chunk_size: int) -> None:
+        """Convert stored image paths into canonical storage keys."""
+
+        _require_schema()
+        count = normalize_image_paths(app.config["UPLOAD_FOLDER"], chunk_size=chunk_size)
+        click.echo(f"Normalized image paths for {count} posts.")
+
+    @app.cli.command("fail-stale-import-jobs")
+    @click.option(
+        "--older-than",
+        default=0,
+        show_default=True,
+        help="Only fail jobs created at least this many minutes ago.",
+    )
+    def fail_stale_import_jobs_command(older_than: int) -> None:
+        """Mark import jobs left queued or running by a stopped server as failed."""
+
+        _require_schema()
+        count = fail_stale_import_jobs(timedelta(minutes=older_than))
+        click.echo(f"Marked {count} import jobs as failed.")
+
+
+__all__ = [
+    "backfill_content_hashes",
+    "backfill_image_derivatives",
+    "backfill_post_tags",
+    "backfill_relevance_scores",
+    "backfill_similarity_signatures",
+    "fail_stale_import_jobs",
+    "normalize_image_paths",
+    "register_commands",
+]
@@ -25,10 +25,74 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv("JWT_EXPIRES_MINUTES", "30")))
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", str(BASE_DIR / "uploads"))
+    # Larger request bodies get 413 before they are read. Leaves room for a
+    # 10 MB image plus the other form fields; imports use IMPORT_MAX_BODY_SIZE.
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", str(12 * 1024 * 1024)))
+    UPLOADS_MAX_AGE = int(os.getenv("UPLOADS_MAX_AGE", str(365 * 24 * 60 * 60)))
+    UPLOADS_OFFLOAD = os.getenv("UPLOADS_OFFLOAD", "")  # "", "x-accel" or "x-sendfile"
+    UPLOADS_ACCEL_PREFIX = os.getenv("UPLOADS_ACCEL_PREFIX", "/_uploads/")
     JSON_SORT_KEYS = False
+    JSON_ENCODER = os.getenv("JSON_ENCODER", "auto")  # "auto", "orjson" or "stdlib"
     PREFERRED_URL_SCHEME = os.getenv("PREFERRED_URL_SCHEME", "http")
     SERVER_NAME = os.getenv("SERVER_NAME", None)
 
+    # Run db.create_all() in create_app; otherwise the schema comes from ``flask init-db``.
+    SCHEMA_AUTO_CREATE = os.getenv("SCHEMA_AUTO_CREATE", "false").lower() in {"1", "true", "yes"}
+    # "production" applies WAL and the PRAGMAs below to file-backed SQLite.
+    SQLITE_ENGINE_PROFILE = os.getenv("SQLITE_ENGINE_PROFILE", "production")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+    DATABASE_READ_SPLIT = os.getenv("DATABASE_READ_SPLIT", "true").lower() in {"1", "true", "yes"}
+    DATABASE_READ_POOL_SIZE = int(os.getenv("DATABASE_READ_POOL_SIZE", "8"))
+    DATABASE_READ_MAX_OVERFLOW = int(os.getenv("DATABASE_READ_MAX_OVERFLOW", "4"))
+    DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+
+    IMAGE_DERIVATIVES_ENABLED = os.getenv("IMAGE_DERIVATIVES_ENABLED", "true").lower() in {"1", "true", "yes"}
+    IMAGE_DERIVATIVE_WEBP = os.getenv("IMAGE_DERIVATIVE_WEBP", "true").lower() in {"1", "true", "yes"}
+    IMAGE_DERIVATIVE_PROCESSES = int(os.getenv("IMAGE_DERIVATIVE_PROCESSES", "2"))
+
+    RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+    RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", None)
+
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in {"1", "true", "yes"}
+    # Bodies smaller than this many bytes are sent uncompressed.
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))  # 1-9
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))  # 0-11
+
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "0.5"))
+
+    IDENTITY_CACHE_MAX_ENTRIES = int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", "4096"))
+    IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "60"))
+
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in {"1", "true", "yes"}
+    # Shared by all workers of one deployment; empty it when the deployment starts.
+    METRICS_DIR = os.getenv("METRICS_DIR", None)
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+    SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() in {"1", "true", "yes"}
+
+    MARINE_KEYWORDS_FILE = os.getenv("MARINE_KEYWORDS_FILE", None)
+    MARINE_KEYWORDS_RELOAD_INTERVAL = float(os.getenv("MARINE_KEYWORDS_RELOAD_INTERVAL", "30"))
+
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+    IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", "100"))
+    IMPORT_MAX_BODY_SIZE = int(os.getenv("IMPORT_MAX_BODY_SIZE", str(256 * 1024 * 1024)))
+    IMPORT_JOB_FOLDER = os.getenv("IMPORT_JOB_FOLDER", None)
+    IMPORT_JOB_WORKERS = int(os.getenv("IMPORT_JOB_WORKERS", "2"))
+    IMPORT_JOB_CHUNK_SIZE = int(os.getenv("IMPORT_JOB_CHUNK_SIZE", "5000"))
+    IMPORT_CLASSIFY_PROCESSES = int(os.getenv("IMPORT_CLASSIFY_PROCESSES", str(os.cpu_count() or 1)))
+    IMPORT_PARALLEL_THRESHOLD = int(os.getenv("IMPORT_PARALLEL_THRESHOLD", "2000"))
+    # What to do with imported near-duplicates: "skip", "link" or "off".
+    IMPORT_NEAR_DUPLICATES = os.getenv("IMPORT_NEAR_DUPLICATES", "skip")
+    # Estimated Jaccard similarity of title + body words, from 0 to 1.
+    IMPORT_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("IMPORT_NEAR_DUPLICATE_THRESHOLD", "0.7"))
+
     ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@bluesea.local")
     ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "bluesea123")
 
@@ -36,4 +100,8 @@ class Config:
 class TestConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SCHEMA_AUTO_CREATE = True
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=1)
+    IMPORT_CLASSIFY_PROCESSES = 0
+    IMAGE_DERIVATIVE_PROCESSES = 0
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
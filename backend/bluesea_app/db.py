@@ -1,6 +1,139 @@
 """Database initialisation for the BlueSea backend."""
 
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from flask import Flask, current_app, has_app_context, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+
+_READ_ENGINE_KEY = "bluesea_read_engine"
+_READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class RoutingSession(Session):
+    """Session that sends reads made while serving GET requests to a read-only pool.
+
+    Everything else, including any flush, uses the default (writer) engine.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):  # type: ignore[override]
+        if bind is None and not self._flushing and has_request_context():
+            read_engine = current_app.extensions.get(_READ_ENGINE_KEY)
+            if read_engine is not None and request.method in _READ_METHODS:
+                return read_engine
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def _is_sqlite_file(uri: Optional[str]) -> bool:
+    if not uri:
+        return False
+    url = make_url(uri)
+    if url.get_backend_name() != "sqlite":
+        return False
+    database = url.database or ""
+    return database not in ("", ":memory:") and url.query.get("mode") != "memory"
+
+
+def _pragmas(app: Flask, read_only: bool) -> Dict[str, Any]:
+    pragmas: Dict[str, Any] = {
+        "synchronous": "NORMAL",
+        "busy_timeout": int(app.config.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+        "mmap_size": int(app.config.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+        # Negative values are KiB rather than pages.
+        "cache_size": -int(app.config.get("SQLITE_CACHE_SIZE_KB", 64 * 1024)),
+        "temp_store": "MEMORY",
+    }
+    if read_only:
+        pragmas["query_only"] = "ON"
+    else:
+        pragmas = {"journal_mode": "WAL", **pragmas}
+    return pragmas
+
+
+def _install_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def prepare_engine_options(app: Flask) -> None:
+    """Fill in ``SQLALCHEMY_ENGINE_OPTIONS`` for the production SQLite profile.
+
+    Must run before :meth:`SQLAlchemy.init_app`. The writer pool holds a
+    single connection because SQLite only allows one writer at a time;
+    queueing in the pool is cheaper than retrying "database is locked".
+    Handlers therefore release the session before slow work that does not
+    touch the database, such as password hashing.
+    """
+
+    if app.config.get("SQLITE_ENGINE_PROFILE") != "production":
+        return
+    if not _is_sqlite_file(app.config.get("SQLALCHEMY_DATABASE_URI")):
+        return
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    options.setdefault("pool_size", 1)
+    options.setdefault("max_overflow", 0)
+    options.setdefault("pool_timeout", float(app.config.get("DATABASE_POOL_TIMEOUT", 30)))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def configure_engines(app: Flask) -> None:
+    """Apply connection pragmas and create the read-only engine.
+
+    Must run after :meth:`SQLAlchemy.init_app`. Only file-backed SQLite
+    databases under the ``production`` profile are affected.
+    """
+
+    if app.config.get("SQLITE_ENGINE_PROFILE") != "production":
+        return
+    if not _is_sqlite_file(app.config.get("SQLALCHEMY_DATABASE_URI")):
+        return
+
+    with app.app_context():
+        writer = db.engine
+    _install_pragmas(writer, _pragmas(app, read_only=False))
+
+    if not app.config.get("DATABASE_READ_SPLIT", True):
+        return
+    reader = create_engine(
+        writer.url,
+        pool_size=max(1, int(app.config.get("DATABASE_READ_POOL_SIZE", 8))),
+        max_overflow=int(app.config.get("DATABASE_READ_MAX_OVERFLOW", 4)),
+        pool_timeout=float(app.config.get("DATABASE_POOL_TIMEOUT", 30)),
+    )
+    _install_pragmas(reader, _pragmas(app, read_only=True))
+    app.extensions[_READ_ENGINE_KEY] = reader
+
+
+def dispose_engines(app: Flask) -> None:
+    """Drop pooled connections inherited from a parent process.
+
+    Called in each gunicorn worker after the fork when the app is preloaded;
+    connections are left open for the parent instead of being closed.
+    """
+
+    with app.app_context():
+        engines = [db.engine, app.extensions.get(_READ_ENGINE_KEY)]
+    for engine in engines:
+        if engine is not None:
+            engine.dispose(close=False)
+
 
+def get_read_engine() -> Optional[Engine]:
+    """Return the read-only engine of the current app, if one is configured."""
 
-db = SQLAlchemy()
+    if not has_app_context():
+        return None
+    return current_app.extensions.get(_READ_ENGINE_KEY)
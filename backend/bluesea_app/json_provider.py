@@ -0,0 +1,82 @@
+"""JSON encoding for API responses, using orjson when it is installed."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+try:  # orjson is optional; without it responses use the standard library.
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None  # type: ignore[assignment]
+
+__all__ = ["OrjsonProvider", "configure_json_provider", "orjson_available"]
+
+
+def orjson_available() -> bool:
+    """Return ``True`` when orjson is installed."""
+
+    return orjson is not None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Drop-in replacement for Flask's provider that encodes with orjson.
+
+    Output matches the default provider apart from non-ASCII characters,
+    which are written as UTF-8 instead of ``\\u`` escapes. Dates, decimals
+    and other types orjson does not handle the Flask way go through
+    :meth:`default`, and values orjson rejects outright (integers wider than
+    64 bits, for example) fall back to the standard library. Calls with
+    explicit ``json.dumps`` options, and pretty-printed debug responses, use
+    the default implementation as well.
+    """
+
+    def _options(self) -> int:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def _encode(self, obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options())
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._encode(obj) + b"\n", mimetype=self.mimetype)
+
+
+def configure_json_provider(app: Flask) -> None:
+    """Install the JSON provider selected by ``JSON_ENCODER``.
+
+    ``"auto"`` (the default) uses orjson when it is installed, ``"orjson"``
+    requires it and ``"stdlib"`` keeps Flask's provider.
+
+    Raises:
+        RuntimeError: If ``JSON_ENCODER`` is ``"orjson"`` but orjson is missing.
+    """
+
+    choice = (app.config.get("JSON_ENCODER") or "auto").lower()
+    if choice == "stdlib":
+        return
+    if orjson is None:
+        if choice == "orjson":
+            raise RuntimeError("JSON_ENCODER is 'orjson' but orjson is not installed.")
+        return
+    app.json = OrjsonProvider(app)
@@ -4,11 +4,10 @@ from __future__ import annotations
 
 import json
 from datetime import datetime
-from typing import Iterable, List
-
-from werkzeug.security import check_password_hash, generate_password_hash
+from typing import Iterable, List, Optional
 
 from .db import db
+from .services.passwords import hash_password, password_needs_rehash, verify_password
 
 
 class User(db.Model):
@@ -22,13 +21,22 @@ class User(db.Model):
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
-    posts = db.relationship("Post", back_populates="author", cascade="all, delete-orphan")
+    # Dynamic, so accessing ``user.posts`` yields a query to page through
+    # rather than loading every post the user has written.
+    posts = db.relationship(
+        "Post", back_populates="author", cascade="all, delete-orphan", lazy="dynamic"
+    )
 
     def set_password(self, password: str) -> None:
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        """Return ``True`` when the stored hash uses outdated parameters."""
+
+        return password_needs_rehash(self.password_hash)
 
     def __repr__(self) -> str:  # pragma: no cover - repr for debugging
         return f"<User {self.email}>"
@@ -38,6 +46,13 @@ class Post(db.Model):
     """Represents a post authored by a user."""
 
     __tablename__ = "posts"
+    __table_args__ = (
+        db.Index("ix_posts_created_at_id", "created_at", "id"),
+        db.Index("ix_posts_source_created_at_id", "source", "created_at", "id"),
+        db.Index("ix_posts_content_hash", "content_hash", unique=True),
+        db.Index("ix_posts_user_id_created_at_id", "user_id", "created_at", "id"),
+        db.Index("ix_posts_relevance_id", "relevance", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
@@ -47,26 +62,159 @@ class Post(db.Model):
     source = db.Column(db.String(50), nullable=False, default="community")
     tags = db.Column(db.Text, nullable=False, default="[]")
     image_path = db.Column(db.String(512))
+    # Extension of the generated image variants; NULL until they exist.
+    image_variants = db.Column(db.String(10))
+    # Fingerprint of source + normalized title/body; only set for imported posts.
+    content_hash = db.Column(db.String(64))
+    # Packed MinHash signature of title + body; see ``services.similarity``.
+    minhash = db.Column(db.LargeBinary)
+    # Earlier post this one was imported as a near-duplicate of.
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey("posts.id"))
+    # Marine relevance score from ``services.relevance``; NULL until scored.
+    relevance = db.Column(db.Float)
 
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     author = db.relationship("User", back_populates="posts")
+    tag_entries = db.relationship(
+        "PostTag",
+        cascade="all, delete-orphan",
+        order_by="PostTag.position",
+        lazy="selectin",
+    )
+    # Deleted by the ORM like tag_entries: SQLite only enforces ON DELETE
+    # CASCADE with PRAGMA foreign_keys, which is not enabled.
+    similarity_bands = db.relationship("PostSimilarityBand", cascade="all, delete-orphan")
 
     def set_tags(self, tags: Iterable[str]) -> None:
-        """Persist the provided collection of tags as a JSON array."""
-
-        normalized = [tag for tag in tags if tag]
+        """Persist the provided collection of tags.
+
+        Tags are stored as indexed :class:`PostTag` rows; the JSON ``tags``
+        column is kept in sync as a legacy mirror.
+        """
+
+        normalized: List[str] = []
+        seen = set()
+        for tag in tags:
+            if not tag or tag in seen:
+                continue
+            seen.add(tag)
+            normalized.append(tag)
         self.tags = json.dumps(normalized)
+        self.tag_entries = [PostTag(tag=tag, position=index) for index, tag in enumerate(normalized)]
 
     def get_tags(self) -> List[str]:
         """Return the list of tags associated with the post."""
 
-        try:
-            value = json.loads(self.tags or "[]")
-        except (TypeError, json.JSONDecodeError):
-            return []
-        if not isinstance(value, list):
-            return []
-        return [str(tag) for tag in value if isinstance(tag, str)]
+        return [entry.tag for entry in self.tag_entries]
 
     def __repr__(self) -> str:  # pragma: no cover - repr for debugging
         return f"<Post {self.id} by user {self.user_id}>"
+
+
+def decode_legacy_tags(raw: Optional[str]) -> List[str]:
+    """Decode the JSON array stored in the legacy ``posts.tags`` column."""
+
+    try:
+        value = json.loads(raw or "[]")
+    except (TypeError, json.JSONDecodeError):
+        return []
+    if not isinstance(value, list):
+        return []
+    return [str(tag) for tag in value if isinstance(tag, str)]
+
+
+class PostTag(db.Model):
+    """A single normalized tag attached to a post."""
+
+    __tablename__ = "post_tags"
+    __table_args__ = (db.Index("ix_post_tags_tag_post_id", "tag", "post_id"),)
+
+    post_id = db.Column(
+        db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
+    )
+    tag = db.Column(db.String(100), primary_key=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:  # pragma: no cover - repr for debugging
+        return f"<PostTag {self.tag} on post {self.post_id}>"
+
+
+class PostSimilarityBand(db.Model):
+    """A hashed band of a post's MinHash signature, for near-duplicate lookups."""
+
+    __tablename__ = "post_similarity_bands"
+
+    value = db.Column(db.BigInteger, primary_key=True)
+    post_id = db.Column(
+        db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover - repr for debugging
+        return f"<PostSimilarityBand {self.value} of post {self.post_id}>"
+
+
+class PostCounter(db.Model):
+    """A running post count for the whole table, one source or one tag."""
+
+    __tablename__ = "post_counters"
+
+    KIND_TOTAL = "total"
+    KIND_SOURCE = "source"
+    KIND_TAG = "tag"
+
+    kind = db.Column(db.String(20), primary_key=True)
+    key = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:  # pragma: no cover - repr for debugging
+        return f"<PostCounter {self.kind}:{self.key}={self.count}>"
+
+
+class ImportJob(db.Model):
+    """Tracks an import running in the background worker pool."""
+
+    __tablename__ = "import_jobs"
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED)
+    content_type = db.Column(db.String(100), nullable=False)
+    payload_path = db.Column(db.String(512), nullable=False)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    duplicates = db.Column(db.Integer, nullable=False, default=0)
+    skipped = db.Column(db.Integer, nullable=False, default=0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Text, nullable=False, default="[]")
+    message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self) -> dict:
+        """Return the job's progress as a JSON-serializable dictionary."""
+
+        def isoformat(value: Optional[datetime]) -> Optional[str]:
+            return value.isoformat() if value else None
+
+        return {
+            "id": self.id,
+            "status": self.status,
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "skipped": self.skipped,
+            "errorCount": self.error_count,
+            "errors": json.loads(self.errors or "[]"),
+            "message": self.message,
+            "created_at": isoformat(self.created_at),
+            "started_at": isoformat(self.started_at),
+            "finished_at": isoformat(self.finished_at),
+        }
+
+    def __repr__(self) -> str:  # pragma: no cover - repr for debugging
+        return f"<ImportJob {self.id} {self.status}>"
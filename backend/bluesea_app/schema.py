@@ -0,0 +1,238 @@
+"""Explicit schema creation and in-place upgrades, run by ``flask init-db``."""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, List
+
+from flask import Flask
+from sqlalchemy import exists, inspect, literal, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import Column, CreateColumn, Table
+
+from .db import db
+from .models import Post, PostTag, decode_legacy_tags
+from .services.counters import increment_tag_counters, reconcile_post_counters
+from .services.dedup import content_fingerprint
+from .services.search import rebuild_search_index
+
+__all__ = [
+    "backfill_content_hashes",
+    "backfill_post_tags",
+    "init_database",
+    "pending_schema_changes",
+    "prepare_directories",
+    "upgrade_schema",
+]
+
+
+def prepare_directories(app: Flask) -> List[str]:
+    """Create the instance, upload, job, metrics and SQLite directories.
+
+    Must run inside an application context. Returns every directory that now
+    exists, whether or not it had to be created.
+    """
+
+    directories = [
+        app.instance_path,
+        app.config.get("UPLOAD_FOLDER"),
+        app.config.get("IMPORT_JOB_FOLDER"),
+        app.config.get("METRICS_DIR"),
+    ]
+    url = db.engine.url
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        directories.append(os.path.dirname(os.path.abspath(url.database)))
+
+    prepared = []
+    for directory in directories:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            prepared.append(str(directory))
+    return prepared
+
+
+def _add_column_ddl(connection: Connection, table: Table, column: Column) -> str:
+    ddl = f"ALTER TABLE {table.name} ADD COLUMN {CreateColumn(column).compile(dialect=connection.dialect)}"
+    if column.nullable or column.server_default is not None:
+        return ddl
+    default = column.default
+    if default is None or not default.is_scalar:
+        raise RuntimeError(
+            f"Cannot add NOT NULL column {table.name}.{column.name} without a scalar default."
+        )
+    value = literal(default.arg, column.type).compile(
+        dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+    )
+    return f"{ddl} DEFAULT {value}"
+
+
+def upgrade_schema(connection: Connection) -> List[str]:
+    """Add missing columns and indexes to tables that already exist.
+
+    Tables that do not exist yet are left to :meth:`MetaData.create_all`.
+    Only additive changes are made; nothing is dropped or altered. Returns a
+    description of every change.
+    """
+
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    changes: List[str] = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                connection.execute(text(_add_column_ddl(connection, table, column)))
+                changes.append(f"added column {table.name}.{column.name}")
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(connection)
+                changes.append(f"created index {index.name}")
+    return changes
+
+
+def backfill_post_tags(chunk_size: int = 500) -> int:
+    """Populate ``post_tags`` from the legacy JSON ``posts.tags`` column.
+
+    Posts are walked in primary key order in chunks of ``chunk_size`` and only
+    posts without any ``post_tags`` rows are touched, so the command can be
+    re-run safely. The tag counters are raised in the same transactions.
+    Returns the number of posts that received tag rows.
+    """
+
+    has_tag_rows = exists().where(PostTag.post_id == Post.id)
+    last_id = 0
+    backfilled = 0
+    while True:
+        rows = db.session.execute(
+            select(Post.id, Post.tags)
+            .where(Post.id > last_id, ~has_tag_rows)
+            .order_by(Post.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        entries = []
+        for post_id, raw_tags in rows:
+            seen = set()
+            for tag in decode_legacy_tags(raw_tags):
+                tag = tag.strip().lower()
+                if not tag or tag in seen:
+                    continue
+                entries.append({"post_id": post_id, "tag": tag, "position": len(seen)})
+                seen.add(tag)
+            if seen:
+                backfilled += 1
+        if entries:
+            db.session.execute(PostTag.__table__.insert(), entries)
+            increment_tag_counters(entry["tag"] for entry in entries)
+        db.session.commit()
+        last_id = rows[-1][0]
+
+    return backfilled
+
+
+def backfill_content_hashes(chunk_size: int = 500) -> int:
+    """Fill ``posts.content_hash`` for posts stored without a fingerprint.
+
+    Posts are walked in primary key order in chunks of ``chunk_size``. The
+    column is unique, so when several posts share content only the oldest
+    receives the fingerprint; imports match against it all the same. Returns
+    the number of posts updated.
+    """
+
+    last_id = 0
+    filled = 0
+    while True:
+        rows = db.session.execute(
+            select(Post.id, Post.source, Post.title, Post.body)
+            .where(Post.id > last_id, Post.content_hash.is_(None))
+            .order_by(Post.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        first_by_hash: Dict[str, int] = {}
+        for post_id, source, title, body in rows:
+            first_by_hash.setdefault(content_fingerprint(source, title, body), post_id)
+        taken = set(
+            db.session.execute(
+                select(Post.content_hash).where(Post.content_hash.in_(list(first_by_hash)))
+            ).scalars()
+        )
+        changes = [
+            {"id": post_id, "content_hash": fingerprint}
+            for fingerprint, post_id in first_by_hash.items()
+            if fingerprint not in taken
+        ]
+        if changes:
+            db.session.execute(update(Post), changes)
+            filled += len(changes)
+        db.session.commit()
+        last_id = rows[-1][0]
+
+    return filled
+
+
+def pending_schema_changes(connection: Connection) -> List[str]:
+    """Return the tables and columns :func:`init_database` would add, changing nothing."""
+
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    pending: List[str] = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            pending.append(f"table {table.name}")
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        pending += [
+            f"column {table.name}.{column.name}"
+            for column in table.columns
+            if column.name not in existing_columns
+        ]
+    return pending
+
+
+def init_database(app: Flask) -> List[str]:
+    """Prepare directories, create missing tables and upgrade existing ones.
+
+    Safe to run on every deploy. On SQLite the full-text search index is
+    installed, and filled from existing posts, when it is missing. The
+    ``post_tags`` table is filled from the legacy tags column, and the post
+    counters from the posts, when their tables are first created; content
+    fingerprints are computed when their column is added. Returns a
+    description of every change.
+    """
+
+    with app.app_context():
+        prepare_directories(app)
+        with db.engine.begin() as connection:
+            had_tables = set(inspect(connection).get_table_names())
+            changes = upgrade_schema(connection)
+            db.metadata.create_all(connection)
+            changes += [
+                f"created table {table.name}"
+                for table in db.metadata.sorted_tables
+                if table.name not in had_tables
+            ]
+            missing_search_index = (
+                connection.dialect.name == "sqlite"
+                and "posts_fts" not in inspect(connection).get_table_names()
+            )
+        if missing_search_index:
+            rebuild_search_index()
+            changes.append("created search index")
+        if "added column posts.content_hash" in changes:
+            count = backfill_content_hashes()
+            changes.append(f"fingerprinted {count} posts")
+        if "posts" in had_tables and "post_tags" not in had_tables:
+            count = backfill_post_tags()
+            changes.append(f"backfilled tags for {count} posts")
+        if "posts" in had_tables and "post_counters" not in had_tables:
+            reconcile_post_counters()
+            changes.append("filled post counters")
+    return changes
@@ -9,6 +9,7 @@ from flask import Flask, current_app
 from . import create_app
 from .db import db
 from .models import User
+from .schema import init_database
 
 
 def ensure_admin_user() -> User:
@@ -35,8 +36,8 @@ def seed_app(app: Optional[Flask] = None) -> None:
     """Run the seed process, creating the administrator user."""
 
     app = app or create_app()
+    init_database(app)
     with app.app_context():
-        db.create_all()
         ensure_admin_user()
 
 
@@ -1,6 +1,22 @@
 """Service layer utilities for the BlueSea application."""
 
-from .marine_filter import MARINE_KEYWORDS, is_marine
-from .storage import StorageError, save_upload
+from .cache import get_response_cache, init_response_cache
+from .dedup import content_fingerprint
+from .jobs import get_process_pool, submit_background
+from .marine_filter import MARINE_KEYWORDS, configure_marine_filter, is_marine, is_marine_batch
+from .storage import StorageError, save_upload, storage_key
 
-__all__ = ["StorageError", "save_upload", "is_marine", "MARINE_KEYWORDS"]
+__all__ = [
+    "StorageError",
+    "save_upload",
+    "storage_key",
+    "is_marine",
+    "is_marine_batch",
+    "configure_marine_filter",
+    "MARINE_KEYWORDS",
+    "content_fingerprint",
+    "get_response_cache",
+    "init_response_cache",
+    "get_process_pool",
+    "submit_background",
+]
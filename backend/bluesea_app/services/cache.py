@@ -0,0 +1,349 @@
+"""Response caching backends used by the read-heavy post endpoints."""
+
+from __future__ import annotations
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Generic, Hashable, NamedTuple, Optional, Tuple, TypeVar
+
+from flask import Flask, current_app
+
+__all__ = [
+    "TTLCache",
+    "CachedResponse",
+    "ResponseCache",
+    "LRUResponseCache",
+    "SQLiteResponseCache",
+    "NullResponseCache",
+    "init_response_cache",
+    "get_response_cache",
+]
+
+_EXTENSION_KEY = "bluesea_response_cache"
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Thread-safe in-process LRU mapping with per-entry expiry.
+
+    Holds at most ``max_entries`` items, dropping the least recently used
+    first, and forgets each item ``ttl`` seconds after it was set. Keeps
+    hit/miss counters for the current process.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K) -> Optional[V]:
+        """Return the live value for ``key``, counting a hit or a miss."""
+
+        value = self.peek(key)
+        with self._lock:
+            if value is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return value
+
+    def peek(self, key: K) -> Optional[V]:
+        """Return the live value for ``key`` and mark it recently used, without counting."""
+
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key: K, value: V) -> int:
+        """Store ``value`` under ``key`` and return how many entries were evicted."""
+
+        expires_at = time.monotonic() + self.ttl
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+        return evicted
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the hit/miss counters and current size of the cache."""
+
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+        }
+
+
+class CachedResponse(NamedTuple):
+    """A fully rendered response body together with its strong ETag."""
+
+    body: bytes
+    etag: str
+    mimetype: str
+
+
+class ResponseCache:
+    """Interface shared by the response cache backends.
+
+    Backends store :class:`CachedResponse` values by string key, expire them
+    after ``ttl`` seconds, evict the least recently used entry once
+    ``max_entries`` is exceeded and keep hit/miss counters for the current
+    process.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the live entry for ``key``, counting a hit or a miss."""
+
+        value = self._lookup(key)
+        self._record(value is not None)
+        return value
+
+    def peek(self, key: str) -> Optional[CachedResponse]:
+        """Return the live entry for ``key`` without touching the hit/miss counters.
+
+        For secondary entries, such as compressed variants, that would
+        otherwise count twice for one request.
+        """
+
+        return self._lookup(key)
+
+    def _lookup(self, key: str) -> Optional[CachedResponse]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the hit/miss counters and current size of the cache."""
+
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+        }
+
+    def _record(self, hit: bool) -> None:
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+class NullResponseCache(ResponseCache):
+    """Backend that never stores anything, used to disable caching."""
+
+    def _lookup(self, key: str) -> Optional[CachedResponse]:
+        return None
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        return None
+
+    def delete(self, key: str) -> None:
+        return None
+
+    def clear(self) -> None:
+        return None
+
+    def __len__(self) -> int:
+        return 0
+
+
+class LRUResponseCache(ResponseCache):
+    """Thread-safe in-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0) -> None:
+        super().__init__(max_entries, ttl)
+        self._entries: TTLCache[str, CachedResponse] = TTLCache(self.max_entries, self.ttl)
+
+    def _lookup(self, key: str) -> Optional[CachedResponse]:
+        return self._entries.peek(key)
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        evicted = self._entries.set(key, value)
+        if evicted:
+            with self._counter_lock:
+                self.evictions += evicted
+
+    def delete(self, key: str) -> None:
+        self._entries.delete(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Cache stored in a local SQLite file so several workers can share it.
+
+    This is a stand-in for a networked cache such as Redis or memcached: all
+    gunicorn workers on the host read and invalidate the same entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024, ttl: float = 30.0) -> None:
+        super().__init__(max_entries, ttl)
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections are opened lazily, per thread and per process, so an
+        # app created before gunicorn forks never shares one with a worker.
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_response_cache_accessed_at"
+                " ON response_cache (accessed_at)"
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _lookup(self, key: str) -> Optional[CachedResponse]:
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+        ).fetchone()
+        value: Optional[CachedResponse] = None
+        if row is not None:
+            if row[1] <= now:
+                connection.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            else:
+                value = CachedResponse(*pickle.loads(row[0]))
+                connection.execute(
+                    "UPDATE response_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+        return value
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO response_cache (key, value, expires_at, accessed_at)"
+            " VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(tuple(value)), now + self.ttl, now),
+        )
+        overflow = len(self) - self.max_entries
+        if overflow > 0:
+            connection.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                " SELECT key FROM response_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            with self._counter_lock:
+                self.evictions += overflow
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM response_cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM response_cache")
+
+    def __len__(self) -> int:
+        row = self._connection().execute("SELECT COUNT(*) FROM response_cache").fetchone()
+        return int(row[0]) if row else 0
+
+
+def init_response_cache(app: Flask) -> ResponseCache:
+    """Create the response cache configured for ``app`` and attach it."""
+
+    backend = (app.config.get("RESPONSE_CACHE_BACKEND") or "memory").lower()
+    max_entries = int(app.config.get("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+    ttl = float(app.config.get("RESPONSE_CACHE_TTL", 30))
+
+    cache: ResponseCache
+    if backend == "memory":
+        cache = LRUResponseCache(max_entries=max_entries, ttl=ttl)
+    elif backend == "sqlite":
+        path = app.config.get("RESPONSE_CACHE_PATH") or str(
+            Path(app.instance_path) / "response_cache.db"
+        )
+        cache = SQLiteResponseCache(path, max_entries=max_entries, ttl=ttl)
+    elif backend in {"none", "null", "off"}:
+        cache = NullResponseCache(max_entries=max_entries, ttl=ttl)
+    else:
+        raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND '{backend}'.")
+
+    app.extensions[_EXTENSION_KEY] = cache
+    return cache
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the response cache attached to the current application."""
+
+    cache = current_app.extensions.get(_EXTENSION_KEY)
+    if cache is None:
+        cache = init_response_cache(current_app)
+    return cache
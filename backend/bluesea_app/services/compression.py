@@ -0,0 +1,131 @@
+"""gzip and brotli response compression negotiated through ``Accept-Encoding``.
+
+Every eligible response is compressed on its way out. Responses served from
+the response cache keep their compressed bodies in the cache as well, next
+to the uncompressed entry, so a popular page is compressed once per encoding
+rather than on every request.
+"""
+
+from __future__ import annotations
+
+import gzip
+from typing import Optional, Tuple
+
+from flask import Flask, Response, current_app, request
+
+from .cache import CachedResponse, ResponseCache
+
+try:  # brotli is optional; without it only gzip is offered.
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None  # type: ignore[assignment]
+
+__all__ = ["available_encodings", "compress", "compress_response", "init_compression"]
+
+_COMPRESSIBLE_MIMETYPES = frozenset(
+    {
+        "application/json",
+        "application/x-ndjson",
+        "application/javascript",
+        "image/svg+xml",
+    }
+)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Return the supported content codings, most preferred first."""
+
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress ``body`` with ``encoding`` at the configured level."""
+
+    if encoding == "br":
+        quality = int(current_app.config.get("COMPRESSION_BROTLI_QUALITY", 5))
+        return brotli.compress(body, quality=quality)
+    if encoding == "gzip":
+        level = int(current_app.config.get("COMPRESSION_GZIP_LEVEL", 6))
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    raise ValueError(f"Unsupported content encoding '{encoding}'.")
+
+
+def _is_compressible(response: Response) -> bool:
+    if not current_app.config.get("COMPRESSION_ENABLED", True):
+        return False
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return False
+    if "Content-Encoding" in response.headers:
+        return False
+    mimetype = response.mimetype or ""
+    if not (mimetype.startswith("text/") or mimetype in _COMPRESSIBLE_MIMETYPES):
+        return False
+    minimum = int(current_app.config.get("COMPRESSION_MIN_SIZE", 1024))
+    return (response.calculate_content_length() or 0) >= minimum
+
+
+def _compressed_variant(
+    cache: ResponseCache, key: str, response: Response, etag: str, encoding: str
+) -> CachedResponse:
+    # Variants are tied to the ETag of the body they were made from, so a
+    # variant that outlived a rebuilt entry is never served. ``peek`` keeps
+    # them out of the hit/miss counters, which count the request once already.
+    variant_etag = f"{etag}-{encoding}"
+    variant_key = f"{key}|{encoding}"
+    variant = cache.peek(variant_key)
+    if variant is None or variant.etag != variant_etag:
+        variant = CachedResponse(
+            body=compress(response.get_data(), encoding), etag=variant_etag, mimetype=response.mimetype
+        )
+        cache.set(variant_key, variant)
+    return variant
+
+
+def compress_response(
+    response: Response, cache: Optional[ResponseCache] = None, cache_key: Optional[str] = None
+) -> Response:
+    """Compress ``response`` in place if it is eligible and the client accepts it.
+
+    Only successful, buffered text and JSON bodies of at least
+    ``COMPRESSION_MIN_SIZE`` bytes are compressed. When ``cache`` and
+    ``cache_key`` are given, the compressed body is looked up in and stored
+    to ``cache``; the response must then carry a strong ETag.
+    """
+
+    if not _is_compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    if cache is not None and cache_key is not None and etag and not weak:
+        variant = _compressed_variant(cache, cache_key, response, etag, encoding)
+        compressed, etag = variant.body, variant.etag
+    else:
+        compressed = compress(response.get_data(), encoding)
+        if etag:
+            etag = f"{etag}-{encoding}"
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(etag, weak=weak)
+    return response
+
+
+def init_compression(app: Flask) -> None:
+    """Compress responses from the ``COMPRESSION_*`` settings.
+
+    Flask runs ``after_request`` hooks in reverse order of registration, so
+    call this after :func:`init_metrics` for the metrics to count compressed
+    bytes.
+    """
+
+    if not app.config.get("COMPRESSION_ENABLED", True):
+        return
+
+    @app.after_request
+    def _compress(response: Response) -> Response:
+        return compress_response(response)
@@ -0,0 +1,113 @@
+"""Post counts per source and per tag, maintained alongside every insert."""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, Iterable, Sequence, Tuple
+
+from sqlalchemy import delete, func, literal, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..db import db
+from ..models import Post, PostCounter, PostTag
+
+__all__ = ["get_post_stats", "increment_post_counters", "increment_tag_counters", "reconcile_post_counters"]
+
+_TOTAL_KEY = "posts"
+
+
+def _apply(deltas: Counter) -> None:
+    """Add ``deltas`` (keyed by ``(kind, key)``) to the counters in the current transaction."""
+
+    if not deltas:
+        return
+    rows = [{"kind": kind, "key": key, "count": delta} for (kind, key), delta in deltas.items()]
+    session = db.session
+    if session.get_bind().dialect.name == "sqlite":
+        statement = sqlite_insert(PostCounter.__table__)
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["kind", "key"],
+                set_={"count": PostCounter.__table__.c.count + statement.excluded.count},
+            ),
+            rows,
+        )
+        return
+    for row in rows:  # pragma: no cover - other databases
+        result = session.execute(
+            update(PostCounter)
+            .where(PostCounter.kind == row["kind"], PostCounter.key == row["key"])
+            .values(count=PostCounter.count + row["count"])
+        )
+        if result.rowcount == 0:
+            session.execute(PostCounter.__table__.insert(), row)
+
+
+def increment_post_counters(posts: Iterable[Tuple[str, Sequence[str]]]) -> None:
+    """Count newly inserted posts, given as ``(source, tags)`` pairs.
+
+    Runs in the caller's transaction, so the counters commit or roll back
+    together with the posts themselves.
+    """
+
+    deltas: Counter = Counter()
+    for source, tags in posts:
+        deltas[(PostCounter.KIND_TOTAL, _TOTAL_KEY)] += 1
+        deltas[(PostCounter.KIND_SOURCE, source)] += 1
+        for tag in tags:
+            deltas[(PostCounter.KIND_TAG, tag)] += 1
+    _apply(deltas)
+
+
+def increment_tag_counters(tags: Iterable[str]) -> None:
+    """Count tag rows added to posts that were already counted, one entry per row.
+
+    Like :func:`increment_post_counters`, runs in the caller's transaction.
+    """
+
+    _apply(Counter((PostCounter.KIND_TAG, tag) for tag in tags))
+
+
+def reconcile_post_counters() -> int:
+    """Rebuild every counter from the ``posts`` and ``post_tags`` tables.
+
+    The old counters are deleted first, which takes the write lock, so the
+    rebuilt counts cannot miss posts committed while the command runs.
+    Returns the number of counter rows written.
+    """
+
+    table = PostCounter.__table__
+    columns = [table.c.kind, table.c.key, table.c.count]
+    sources = [
+        select(literal(PostCounter.KIND_TOTAL), literal(_TOTAL_KEY), func.count(Post.id)),
+        select(literal(PostCounter.KIND_SOURCE), Post.source, func.count(Post.id)).group_by(Post.source),
+        select(literal(PostCounter.KIND_TAG), PostTag.tag, func.count(PostTag.post_id)).group_by(PostTag.tag),
+    ]
+    db.session.execute(delete(PostCounter))
+    for source in sources:
+        db.session.execute(table.insert().from_select(columns, source))
+    db.session.commit()
+    return db.session.scalar(select(func.count()).select_from(table)) or 0
+
+
+def get_post_stats() -> Dict[str, object]:
+    """Return the total post count and the counts per source and per tag.
+
+    Sources and tags are ordered by descending count, then name; zero
+    counts are left out.
+    """
+
+    rows = db.session.execute(
+        select(PostCounter.kind, PostCounter.key, PostCounter.count)
+        .where(PostCounter.count > 0)
+        .order_by(PostCounter.kind, PostCounter.count.desc(), PostCounter.key)
+    ).all()
+    stats: Dict[str, object] = {"total": 0, "sources": {}, "tags": {}}
+    for kind, key, count in rows:
+        if kind == PostCounter.KIND_TOTAL:
+            stats["total"] = count
+        elif kind == PostCounter.KIND_SOURCE:
+            stats["sources"][key] = count  # type: ignore[index]
+        elif kind == PostCounter.KIND_TAG:
+            stats["tags"][key] = count  # type: ignore[index]
+    return stats
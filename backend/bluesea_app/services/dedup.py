@@ -0,0 +1,30 @@
+"""Content fingerprints used to de-duplicate imported posts."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Final, Optional
+
+__all__ = ["content_fingerprint", "normalize_text"]
+
+_WHITESPACE_RE: Final = re.compile(r"\s+")
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Case-fold ``value`` and collapse runs of whitespace."""
+
+    if not value:
+        return ""
+    return _WHITESPACE_RE.sub(" ", value.casefold()).strip()
+
+
+def content_fingerprint(source: str, title: str, body: str) -> str:
+    """Return the SHA-256 fingerprint identifying a post's content.
+
+    Two posts from the same ``source`` whose title and body only differ in
+    case or whitespace share a fingerprint.
+    """
+
+    material = "\x1f".join((normalize_text(source), normalize_text(title), normalize_text(body)))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
@@ -0,0 +1,86 @@
+"""Cached resolution of JWT identities to the user fields handlers need."""
+
+from __future__ import annotations
+
+from typing import NamedTuple, Optional
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event, select
+
+from ..db import db
+from ..models import User
+from .cache import TTLCache
+
+__all__ = [
+    "CachedIdentity",
+    "get_identity_cache",
+    "init_identity_cache",
+    "invalidate_identity",
+    "load_identity",
+]
+
+_EXTENSION_KEY = "bluesea_identity_cache"
+
+
+class CachedIdentity(NamedTuple):
+    """The subset of :class:`~bluesea_app.models.User` exposed as ``current_user``."""
+
+    id: int
+    email: str
+    is_admin: bool
+
+
+def init_identity_cache(app: Flask) -> "TTLCache[int, CachedIdentity]":
+    """Create the identity cache for ``app`` from ``IDENTITY_CACHE_*`` settings."""
+
+    cache: TTLCache[int, CachedIdentity] = TTLCache(
+        max_entries=int(app.config.get("IDENTITY_CACHE_MAX_ENTRIES", 4096)),
+        ttl=float(app.config.get("IDENTITY_CACHE_TTL", 60)),
+    )
+    app.extensions[_EXTENSION_KEY] = cache
+    return cache
+
+
+def get_identity_cache() -> "TTLCache[int, CachedIdentity]":
+    """Return the identity cache attached to the current application."""
+
+    cache = current_app.extensions.get(_EXTENSION_KEY)
+    if cache is None:
+        cache = init_identity_cache(current_app)
+    return cache
+
+
+def load_identity(user_id: int) -> Optional[CachedIdentity]:
+    """Return the cached identity for ``user_id``, loading it on a miss.
+
+    Unknown users are not cached, so an account created after a failed
+    lookup is found on the next request.
+    """
+
+    cache = get_identity_cache()
+    identity = cache.get(user_id)
+    if identity is not None:
+        return identity
+
+    row = db.session.execute(
+        select(User.id, User.email, User.is_admin).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    identity = CachedIdentity(id=row.id, email=row.email, is_admin=bool(row.is_admin))
+    cache.set(user_id, identity)
+    return identity
+
+
+def invalidate_identity(user_id: Optional[int]) -> None:
+    """Drop the cached identity of ``user_id`` in the current application."""
+
+    if user_id is not None and has_app_context():
+        get_identity_cache().delete(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(_mapper, _connection, target: User) -> None:
+    # Other workers keep their copy until IDENTITY_CACHE_TTL expires it.
+    invalidate_identity(target.id)
@@ -0,0 +1,151 @@
+"""Resized image derivatives generated in the background after upload."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import tempfile
+from concurrent.futures import Future
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Final, Optional
+
+from flask import Flask, current_app
+from sqlalchemy import update
+
+from ..db import db
+from ..models import Post
+from .cache import get_response_cache
+from .jobs import get_process_pool, submit_background
+from .storage import upload_path
+
+__all__ = [
+    "VARIANT_SIZES",
+    "derivative_relative_path",
+    "derivatives_available",
+    "generate_derivatives",
+    "is_local_image",
+    "schedule_derivatives",
+]
+
+# Longest edge, in pixels, of each generated variant.
+VARIANT_SIZES: Final[Dict[str, int]] = {"thumb": 320, "feed": 960, "full": 2048}
+DERIVED_DIRNAME: Final[str] = "derived"
+_JPEG_QUALITY: Final[int] = 82
+_WEBP_QUALITY: Final[int] = 80
+
+
+@lru_cache(maxsize=1)
+def derivatives_available() -> bool:
+    """Return ``True`` when Pillow is installed.
+
+    Pillow is optional, and only imported by the workers that resize images,
+    so web workers start without loading it.
+    """
+
+    return importlib.util.find_spec("PIL") is not None
+
+
+def is_local_image(image_path: Optional[str]) -> bool:
+    """Return ``True`` for images stored in the upload folder rather than remote URLs."""
+
+    return bool(image_path) and not image_path.lower().startswith(("http://", "https://"))
+
+
+def derivative_relative_path(image_path: str, variant: str, extension: str) -> str:
+    """Return the upload-relative path of ``variant`` for the original ``image_path``."""
+
+    # Plain string handling: this runs for every variant of every serialized post.
+    parent, _, name = image_path.replace("\\", "/").rpartition("/")
+    dot = name.rfind(".")
+    stem = name[:dot] if 0 < dot < len(name) - 1 else name
+    directory = f"{DERIVED_DIRNAME}/{parent}/" if parent else f"{DERIVED_DIRNAME}/"
+    return f"{directory}{stem}_{variant}.{extension}"
+
+
+def generate_derivatives(upload_folder: str, image_path: str, webp: bool) -> str:
+    """Write every variant of ``image_path`` and return their file extension.
+
+    Runs in pool workers, so it only touches the filesystem. Variants that
+    already exist are left alone, which makes re-runs and duplicate uploads
+    cheap.
+
+    Raises:
+        StorageError: If the image or a variant would lie outside ``upload_folder``.
+    """
+
+    try:
+        from PIL import Image, ImageOps
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise RuntimeError("Pillow is required to generate image derivatives.") from exc
+
+    source = upload_path(upload_folder, image_path)
+    with Image.open(source) as opened:
+        original_format = opened.format
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+
+    if webp:
+        extension, save_format, options = "webp", "WEBP", {"quality": _WEBP_QUALITY, "method": 4}
+    elif original_format == "PNG":
+        extension, save_format, options = "png", "PNG", {"optimize": True}
+    else:
+        extension, save_format, options = "jpg", "JPEG", {"quality": _JPEG_QUALITY, "optimize": True, "progressive": True}
+
+    for variant, size in VARIANT_SIZES.items():
+        destination = upload_path(upload_folder, derivative_relative_path(image_path, variant, extension))
+        if destination.exists():
+            continue
+        destination.parent.mkdir(parents=True, exist_ok=True)
+
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+        if save_format == "JPEG" and resized.mode not in ("RGB", "L"):
+            resized = resized.convert("RGB")
+
+        handle = tempfile.NamedTemporaryFile(dir=destination.parent, suffix=f".{extension}", delete=False)
+        try:
+            with handle:
+                resized.save(handle, format=save_format, **options)
+            os.replace(handle.name, destination)
+        except BaseException:
+            Path(handle.name).unlink(missing_ok=True)
+            raise
+
+    return extension
+
+
+def _record_derivatives(app: Flask, image_path: str, future: Future) -> None:
+    try:
+        extension = future.result()
+    except Exception:  # pragma: no cover - logged, the original stays usable
+        app.logger.exception("Generating derivatives for %s failed", image_path)
+        return
+
+    with app.app_context():
+        db.session.execute(
+            update(Post).where(Post.image_path == image_path).values(image_variants=extension)
+        )
+        db.session.commit()
+        get_response_cache().clear()
+
+
+def schedule_derivatives(image_path: str) -> Optional[Future]:
+    """Generate the variants of an uploaded image off the request thread.
+
+    Work goes to the process pool sized by ``IMAGE_DERIVATIVE_PROCESSES``
+    (or the job thread pool when that is ``0``). Once finished, every post
+    using the image records the variant extension in ``image_variants``.
+    """
+
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    if not app.config.get("IMAGE_DERIVATIVES_ENABLED", True) or not derivatives_available():
+        return None
+    if not is_local_image(image_path):
+        return None
+
+    args = (app.config["UPLOAD_FOLDER"], image_path, bool(app.config.get("IMAGE_DERIVATIVE_WEBP", True)))
+    pool = get_process_pool("IMAGE_DERIVATIVE_PROCESSES", min_workers=1)
+    future = pool.submit(generate_derivatives, *args) if pool else submit_background(generate_derivatives, *args)
+    future.add_done_callback(lambda done: _record_derivatives(app, image_path, done))
+    return future
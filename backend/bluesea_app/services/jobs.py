@@ -0,0 +1,67 @@
+"""Local worker pools for background work such as large imports."""
+
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from flask import Flask, current_app
+
+__all__ = ["submit_background", "get_process_pool"]
+
+_THREAD_POOL_KEY = "bluesea_job_threads"
+_PROCESS_POOL_KEY = "bluesea_job_processes"
+_pool_lock = threading.Lock()
+
+
+def _thread_pool(app: Flask) -> ThreadPoolExecutor:
+    with _pool_lock:
+        pool = app.extensions.get(_THREAD_POOL_KEY)
+        if pool is None:
+            workers = max(1, int(app.config.get("IMPORT_JOB_WORKERS", 2)))
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bluesea-job")
+            app.extensions[_THREAD_POOL_KEY] = pool
+        return pool
+
+
+def submit_background(function: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """Run ``function`` on the application's job thread pool.
+
+    The call executes inside an application context of the current app so it
+    can use the database session and configuration like a request handler.
+    """
+
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+
+    def run() -> Any:
+        with app.app_context():
+            return function(*args, **kwargs)
+
+    return _thread_pool(app).submit(run)
+
+
+def get_process_pool(
+    config_key: str = "IMPORT_CLASSIFY_PROCESSES", min_workers: int = 2
+) -> Optional[Executor]:
+    """Return the process pool sized by ``config_key``, or ``None`` if disabled.
+
+    Each configuration key gets its own pool, created on first use with the
+    ``spawn`` start method, which is safe to use from threaded workers. The
+    pool is disabled when fewer than ``min_workers`` processes are configured.
+    """
+
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    processes = int(app.config.get(config_key) or 0)
+    if processes < max(1, min_workers):
+        return None
+    pools = app.extensions.setdefault(_PROCESS_POOL_KEY, {})
+    with _pool_lock:
+        pool = pools.get(config_key)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+            )
+            pools[config_key] = pool
+        return pool
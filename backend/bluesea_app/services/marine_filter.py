@@ -2,7 +2,16 @@
 
 from __future__ import annotations
 
-from typing import Final, Optional
+import os
+import re
+import threading
+import time
+from concurrent.futures import Executor
+from functools import lru_cache
+from itertools import repeat
+from typing import Dict, Final, Iterable, List, Optional, Pattern, Tuple
+
+from flask import Flask
 
 # A curated list of keywords associated with marine and oceanic topics.
 MARINE_KEYWORDS: Final = (
@@ -46,18 +55,224 @@ MARINE_KEYWORDS: Final = (
 )
 
 
+# Endings whose plural takes "es" ("beach" -> "beaches"); every other
+# keyword only gets a plain "s", so "bayes" does not count as "bay".
+_ES_PLURAL_ENDINGS: Final = ("s", "x", "z", "ch", "sh")
+_DEFAULT_RELOAD_INTERVAL: Final = 30.0
+
+
+def keyword_forms(keyword: str) -> Tuple[str, str]:
+    """Return ``keyword`` and its regular plural."""
+
+    suffix = "es" if keyword.endswith(_ES_PLURAL_ENDINGS) else "s"
+    return keyword, keyword + suffix
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a regular expression alternation factored as a prefix trie.
+
+    Sharing prefixes ("sea", "seabird", "seagrass", ...) keeps the regex
+    engine from re-testing the same characters for every keyword, which makes
+    the compiled pattern behave like a small Aho-Corasick automaton.
+    """
+
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: Dict[str, dict]) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if terminal else body
+
+    return render(trie)
+
+
+class MarineMatcher:
+    """Compiled single-pass matcher for a set of marine keywords.
+
+    Keywords match whole words only, in the singular or their regular plural
+    (see :func:`keyword_forms`), so "whales" matches "whale" while "ebay" and
+    "bayes" do not match "bay". ``forms`` maps every matched form back to its
+    keyword.
+    """
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        normalized = sorted({keyword.strip().casefold() for keyword in keywords if keyword and keyword.strip()})
+        self.keywords: Tuple[str, ...] = tuple(normalized)
+        self.forms: Dict[str, str] = {}
+        for keyword in self.keywords:
+            for form in keyword_forms(keyword):
+                self.forms.setdefault(form, keyword)
+        if self.keywords:
+            pattern = r"\b" + _trie_pattern(self.forms) + r"\b"
+            self._pattern: Optional[Pattern[str]] = re.compile(pattern)
+        else:
+            self._pattern = None
+
+    @property
+    def pattern(self) -> Optional[Pattern[str]]:
+        """The compiled keyword pattern, for case-folded text; ``None`` without keywords."""
+
+        return self._pattern
+
+    def matches(self, text: Optional[str]) -> bool:
+        """Return ``True`` when ``text`` contains at least one keyword."""
+
+        if self._pattern is None or not text or not isinstance(text, str):
+            return False
+        # Case-folding up front is markedly cheaper than an IGNORECASE pattern.
+        return self._pattern.search(text.casefold()) is not None
+
+    def findall(self, text: Optional[str]) -> List[str]:
+        """Return every keyword occurrence in ``text``, case-folded, plurals included."""
+
+        if self._pattern is None or not text or not isinstance(text, str):
+            return []
+        return self._pattern.findall(text.casefold())
+
+
+class _KeywordFileWatcher:
+    """Reload keywords from a file when it changes, checking at most every interval."""
+
+    def __init__(self, path: str, interval: float) -> None:
+        self.path = path
+        self.interval = max(0.0, interval)
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.interval
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                return
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+            set_marine_keywords(load_keywords_file(self.path))
+
+
+_matcher = MarineMatcher(MARINE_KEYWORDS)
+_watcher: Optional[_KeywordFileWatcher] = None
+
+
+def _active_matcher() -> MarineMatcher:
+    if _watcher is not None:
+        _watcher.maybe_reload()
+    return _matcher
+
+
+def load_keywords_file(path: str) -> List[str]:
+    """Read one keyword per line from ``path``, ignoring blanks and ``#`` comments."""
+
+    with open(path, encoding="utf-8") as handle:
+        return [line.split("#", 1)[0].strip() for line in handle if line.split("#", 1)[0].strip()]
+
+
+def set_marine_keywords(keywords: Iterable[str]) -> MarineMatcher:
+    """Compile ``keywords`` and make them the active keyword set."""
+
+    global _matcher
+    _matcher = MarineMatcher(keywords)
+    return _matcher
+
+
+def get_marine_keywords() -> Tuple[str, ...]:
+    """Return the keywords currently used by :func:`is_marine`."""
+
+    return _active_matcher().keywords
+
+
+def configure_marine_filter(app: Flask) -> None:
+    """Apply the keyword configuration of ``app``.
+
+    ``MARINE_KEYWORDS_FILE`` points at a keyword file that is re-read whenever
+    it changes (checked every ``MARINE_KEYWORDS_RELOAD_INTERVAL`` seconds), so
+    the list can be edited without restarting workers. Without a file the
+    built-in :data:`MARINE_KEYWORDS` are used.
+    """
+
+    global _watcher
+    path = app.config.get("MARINE_KEYWORDS_FILE")
+    if not path:
+        _watcher = None
+        set_marine_keywords(MARINE_KEYWORDS)
+        return
+    interval = float(app.config.get("MARINE_KEYWORDS_RELOAD_INTERVAL", _DEFAULT_RELOAD_INTERVAL))
+    _watcher = _KeywordFileWatcher(str(path), interval)
+    _watcher.maybe_reload()
+
+
 def is_marine(text: Optional[str]) -> bool:
     """Return ``True`` when the provided ``text`` references marine topics.
 
-    The check performs a simple case-insensitive keyword lookup against
-    :data:`MARINE_KEYWORDS`. Non-string or empty inputs yield ``False``.
+    The check runs the compiled keyword matcher over ``text`` in a single
+    case-insensitive pass, matching whole words and their plurals. Non-string
+    or empty inputs yield ``False``.
     """
 
-    if not text or not isinstance(text, str):
-        return False
+    return _active_matcher().matches(text)
+
+
+def is_marine_batch(
+    texts: Iterable[Optional[str]],
+    executor: Optional[Executor] = None,
+    slice_size: int = 1000,
+) -> List[bool]:
+    """Classify many texts at once, resolving the active matcher only once.
+
+    When an ``executor`` (typically a process pool) is given and there are more
+    than ``slice_size`` texts, the texts are classified in slices across the
+    executor's workers.
+    """
+
+    matcher = _active_matcher()
+    if executor is None:
+        return [matcher.matches(text) for text in texts]
+
+    items = list(texts)
+    if len(items) <= slice_size:
+        return [matcher.matches(text) for text in items]
+    slices = [items[start : start + slice_size] for start in range(0, len(items), slice_size)]
+    results = executor.map(_classify_slice, repeat(matcher.keywords), slices)
+    return [flag for flags in results for flag in flags]
+
+
+@lru_cache(maxsize=4)
+def _matcher_for(keywords: Tuple[str, ...]) -> MarineMatcher:
+    return MarineMatcher(keywords)
+
 
-    normalized = text.casefold()
-    return any(keyword in normalized for keyword in MARINE_KEYWORDS)
+def _classify_slice(keywords: Tuple[str, ...], texts: List[Optional[str]]) -> List[bool]:
+    # Runs in pool workers, which do not share the parent's active matcher.
+    matcher = _matcher_for(keywords)
+    return [matcher.matches(text) for text in texts]
 
 
-__all__ = ["is_marine", "MARINE_KEYWORDS"]
+__all__ = [
+    "is_marine",
+    "is_marine_batch",
+    "MARINE_KEYWORDS",
+    "MarineMatcher",
+    "configure_marine_filter",
+    "get_marine_keywords",
+    "keyword_forms",
+    "load_keywords_file",
+    "set_marine_keywords",
+]
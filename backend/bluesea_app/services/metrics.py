@@ -0,0 +1,334 @@
+"""Request timing, SQL query accounting and Prometheus text exposition.
+
+Each process keeps its own counters in memory. Updating them costs a lock,
+a bisect and a few additions per request. When ``METRICS_DIR`` is set, a
+background thread in every worker writes a snapshot to
+``<METRICS_DIR>/<pid>.json`` every ``METRICS_FLUSH_INTERVAL`` seconds, and
+the exposition endpoint sums the snapshots of all workers, past and present.
+When a worker exits, the gunicorn master folds its snapshot into
+``archive.json`` (see :func:`archive_snapshot`), so counters survive worker
+restarts, as Prometheus expects, without one file per recycled worker.
+Without ``METRICS_DIR`` the endpoint only reports the process that answered.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from ..db import db, get_read_engine
+
+__all__ = ["MetricsRegistry", "archive_snapshot", "get_metrics", "init_metrics", "render_metrics"]
+
+_EXTENSION_KEY = "bluesea_metrics"
+_STARTED_KEY = "_bluesea_metrics_started"
+_SQL_KEY = "_bluesea_metrics_sql"
+_QUERY_START_KEY = "bluesea_metrics_query_start"
+_ARCHIVE_NAME = "archive.json"
+
+# Upper bounds, in seconds, of the request duration histogram buckets.
+DURATION_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_Key = Tuple[str, str]  # (method, endpoint)
+
+
+def _new_series() -> Dict[str, Any]:
+    return {
+        "statuses": {},
+        "buckets": [0] * (len(DURATION_BUCKETS) + 1),
+        "duration_sum": 0.0,
+        "count": 0,
+        "response_bytes": 0,
+        "queries": 0,
+        "query_seconds": 0.0,
+    }
+
+
+class MetricsRegistry:
+    """Per-process request metrics, optionally shared through snapshot files."""
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 5.0) -> None:
+        self._series: Dict[_Key, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._directory = Path(directory) if directory else None
+        self._flush_interval = max(0.1, flush_interval)
+        self._flusher_pid: Optional[int] = None
+        if self._directory is not None:
+            atexit.register(self.flush)
+
+    def observe(
+        self,
+        method: str,
+        endpoint: str,
+        status: int,
+        duration: float,
+        response_bytes: int,
+        queries: int,
+        query_seconds: float,
+    ) -> None:
+        """Record one finished request."""
+
+        bucket = bisect_left(DURATION_BUCKETS, duration)
+        with self._lock:
+            series = self._series.get((method, endpoint))
+            if series is None:
+                series = self._series[(method, endpoint)] = _new_series()
+            statuses = series["statuses"]
+            statuses[status] = statuses.get(status, 0) + 1
+            series["buckets"][bucket] += 1
+            series["duration_sum"] += duration
+            series["count"] += 1
+            series["response_bytes"] += response_bytes
+            series["queries"] += queries
+            series["query_seconds"] += query_seconds
+        if self._directory is not None and self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def _start_flusher(self) -> None:
+        # One daemon thread per process (workers forked from a preloaded
+        # master start their own), so idle workers still publish their counts.
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_periodically, name="bluesea-metrics", daemon=True).start()
+
+    def _flush_periodically(self) -> None:
+        while True:
+            time.sleep(self._flush_interval)
+            try:
+                self.flush()
+            except OSError:  # pragma: no cover - retried on the next tick
+                pass
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return a JSON-serializable copy of this process's series."""
+
+        with self._lock:
+            return [
+                {
+                    "method": method,
+                    "endpoint": endpoint,
+                    **series,
+                    "statuses": {str(code): total for code, total in series["statuses"].items()},
+                    "buckets": list(series["buckets"]),
+                }
+                for (method, endpoint), series in self._series.items()
+            ]
+
+    def flush(self) -> None:
+        """Write this process's snapshot to ``<directory>/<pid>.json``."""
+
+        if self._directory is None:
+            return
+        self._directory.mkdir(parents=True, exist_ok=True)
+        _write_snapshot(self._directory / f"{os.getpid()}.json", self.snapshot())
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """Return the series of every process sharing the metrics directory."""
+
+        if self._directory is None:
+            return self.snapshot()
+        self.flush()
+        snapshots: List[List[Dict[str, Any]]] = []
+        for path in self._directory.glob("*.json"):
+            try:
+                snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):  # pragma: no cover - file replaced mid-read
+                continue
+        return _merge(snapshots)
+
+
+def _write_snapshot(path: Path, snapshot: List[Dict[str, Any]]) -> None:
+    payload = json.dumps(snapshot).encode("utf-8")
+    handle = tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False)
+    try:
+        with handle:
+            handle.write(payload)
+        os.replace(handle.name, path)
+    except OSError:
+        Path(handle.name).unlink(missing_ok=True)
+        raise
+
+
+def _read_snapshot(path: Path) -> List[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return []
+
+
+def archive_snapshot(directory: str, pid: int) -> None:
+    """Fold the snapshot of the exited process ``pid`` into ``archive.json``.
+
+    Called by the gunicorn master for every worker that exits, so the
+    directory holds one snapshot per live worker plus the archive.
+    """
+
+    root = Path(directory)
+    source = root / f"{pid}.json"
+    if not source.exists():
+        return
+    archive = root / _ARCHIVE_NAME
+    _write_snapshot(archive, _merge([_read_snapshot(archive), _read_snapshot(source)]))
+    source.unlink(missing_ok=True)
+
+
+def _merge(snapshots: Iterable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    merged: Dict[_Key, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for entry in snapshot:
+            key = (entry["method"], entry["endpoint"])
+            target = merged.get(key)
+            if target is None:
+                target = merged[key] = {"method": key[0], "endpoint": key[1], **_new_series()}
+            for code, total in entry["statuses"].items():
+                target["statuses"][code] = target["statuses"].get(code, 0) + total
+            target["buckets"] = [a + b for a, b in zip(target["buckets"], entry["buckets"])]
+            for field in ("duration_sum", "count", "response_bytes", "queries", "query_seconds"):
+                target[field] += entry[field]
+    return list(merged.values())
+
+
+def _labels(**labels: Any) -> str:
+    parts = []
+    for name, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics(series: List[Dict[str, Any]]) -> str:
+    """Render ``series`` in the Prometheus text exposition format (0.0.4)."""
+
+    ordered = sorted(series, key=lambda entry: (entry["endpoint"], entry["method"]))
+    lines = [
+        "# HELP bluesea_http_requests_total Requests handled, by endpoint and status.",
+        "# TYPE bluesea_http_requests_total counter",
+    ]
+    for entry in ordered:
+        for code, total in sorted(entry["statuses"].items()):
+            labels = _labels(method=entry["method"], endpoint=entry["endpoint"], status=code)
+            lines.append(f"bluesea_http_requests_total{labels} {total}")
+
+    lines += [
+        "# HELP bluesea_http_request_duration_seconds Time spent handling requests.",
+        "# TYPE bluesea_http_request_duration_seconds histogram",
+    ]
+    for entry in ordered:
+        method, endpoint = entry["method"], entry["endpoint"]
+        cumulative = 0
+        for bound, observed in zip(DURATION_BUCKETS + (float("inf"),), entry["buckets"]):
+            cumulative += observed
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(
+                f"bluesea_http_request_duration_seconds_bucket{_labels(method=method, endpoint=endpoint, le=le)} {cumulative}"
+            )
+        labels = _labels(method=method, endpoint=endpoint)
+        lines.append(f"bluesea_http_request_duration_seconds_sum{labels} {_number(entry['duration_sum'])}")
+        lines.append(f"bluesea_http_request_duration_seconds_count{labels} {entry['count']}")
+
+    for name, field, kind, help_text in (
+        ("bluesea_http_response_size_bytes_total", "response_bytes", "counter", "Response body bytes sent."),
+        ("bluesea_db_queries_total", "queries", "counter", "SQL statements executed while handling requests."),
+        ("bluesea_db_query_duration_seconds_total", "query_seconds", "counter", "Time spent executing SQL statements."),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for entry in ordered:
+            labels = _labels(method=entry["method"], endpoint=entry["endpoint"])
+            lines.append(f"{name}{labels} {_number(entry[field])}")
+
+    return "\n".join(lines) + "\n"
+
+
+def get_metrics() -> Optional[MetricsRegistry]:
+    """Return the metrics registry of the current application, if enabled."""
+
+    return current_app.extensions.get(_EXTENSION_KEY)
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    if has_request_context():
+        conn.info[_QUERY_START_KEY] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    started = conn.info.pop(_QUERY_START_KEY, None)
+    if started is None or not has_request_context():
+        return
+    totals = g.get(_SQL_KEY)
+    if totals is not None:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - started
+
+
+def _listen_to_engines(app: Flask) -> None:
+    with app.app_context():
+        engines = [db.engine, get_read_engine()]
+    for engine in engines:
+        if engine is not None and not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def init_metrics(app: Flask) -> Optional[MetricsRegistry]:
+    """Install request instrumentation from the ``METRICS_*`` settings.
+
+    Must run after the database engines are configured. Adds a
+    ``Server-Timing`` header with total, database and query count to every
+    response unless ``SERVER_TIMING_ENABLED`` is false.
+    """
+
+    if not app.config.get("METRICS_ENABLED", True):
+        return None
+
+    registry = MetricsRegistry(
+        directory=app.config.get("METRICS_DIR"),
+        flush_interval=float(app.config.get("METRICS_FLUSH_INTERVAL", 5)),
+    )
+    app.extensions[_EXTENSION_KEY] = registry
+    _listen_to_engines(app)
+    server_timing = bool(app.config.get("SERVER_TIMING_ENABLED", True))
+
+    @app.before_request
+    def _start_timer() -> None:
+        g.setdefault(_STARTED_KEY, time.perf_counter())
+        g.setdefault(_SQL_KEY, [0, 0.0])
+
+    @app.after_request
+    def _record_request(response: Response) -> Response:
+        started = g.get(_STARTED_KEY)
+        if started is None:
+            return response
+        duration = time.perf_counter() - started
+        queries, query_seconds = g.get(_SQL_KEY, (0, 0.0))
+
+        rule = request.url_rule
+        endpoint = rule.rule if rule is not None else "<unmatched>"
+        size = response.content_length
+        if size is None:
+            size = response.calculate_content_length() or 0
+        registry.observe(request.method, endpoint, response.status_code, duration, size, queries, query_seconds)
+
+        if server_timing:
+            response.headers.add(
+                "Server-Timing",
+                f'app;dur={duration * 1000:.2f}, db;dur={query_seconds * 1000:.2f};desc="{queries} queries"',
+            )
+        return response
+
+    return registry
@@ -0,0 +1,113 @@
+"""Password hashing on a bounded worker pool with configurable cost."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+__all__ = [
+    "PasswordHashingBusy",
+    "hash_password",
+    "password_needs_rehash",
+    "verify_password",
+]
+
+_EXTENSION_KEY = "bluesea_password_pool"
+_DEFAULT_METHOD = "scrypt:32768:8:1"
+_pool_lock = threading.Lock()
+
+
+class PasswordHashingBusy(RuntimeError):
+    """Raised when the hashing queue is full and the request should be retried."""
+
+
+class _HashingPool:
+    """Thread pool that admits at most ``workers + queue_limit`` derivations.
+
+    Key derivation releases the GIL, so a small pool caps the CPU that login
+    bursts can take while read requests keep being served. Callers that
+    cannot get a slot within ``timeout`` seconds are rejected.
+    """
+
+    def __init__(self, workers: int, queue_limit: int, timeout: float) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bluesea-hash")
+        self._slots = threading.BoundedSemaphore(workers + max(0, queue_limit))
+        self._timeout = max(0.0, timeout)
+
+    def run(self, function: Callable[..., Any], *args: Any) -> Any:
+        if not self._slots.acquire(timeout=self._timeout):
+            raise PasswordHashingBusy("Too many password operations in progress.")
+        try:
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _done: self._slots.release())
+        return future.result()
+
+
+def _pool() -> Optional[_HashingPool]:
+    if not has_app_context():
+        return None
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    pool = app.extensions.get(_EXTENSION_KEY)
+    if pool is None:
+        with _pool_lock:
+            pool = app.extensions.get(_EXTENSION_KEY)
+            if pool is None:
+                pool = _HashingPool(
+                    workers=max(1, int(app.config.get("PASSWORD_HASH_WORKERS", 2))),
+                    queue_limit=int(app.config.get("PASSWORD_HASH_QUEUE_LIMIT", 32)),
+                    timeout=float(app.config.get("PASSWORD_HASH_QUEUE_TIMEOUT", 0.5)),
+                )
+                app.extensions[_EXTENSION_KEY] = pool
+    return pool
+
+
+def _run(function: Callable[..., Any], *args: Any) -> Any:
+    pool = _pool()
+    return pool.run(function, *args) if pool is not None else function(*args)
+
+
+def _method() -> str:
+    if has_app_context():
+        return current_app.config.get("PASSWORD_HASH_METHOD") or _DEFAULT_METHOD
+    return _DEFAULT_METHOD
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method: str) -> str:
+    # Werkzeug fills in default parameters ("scrypt" -> "scrypt:32768:8:1"),
+    # so derive the canonical prefix once from a throwaway hash.
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
+def hash_password(password: str) -> str:
+    """Hash ``password`` with ``PASSWORD_HASH_METHOD`` on the worker pool.
+
+    Raises:
+        PasswordHashingBusy: If the hashing queue is full.
+    """
+
+    return _run(generate_password_hash, password, _method())
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """Check ``password`` against ``password_hash`` on the worker pool.
+
+    Raises:
+        PasswordHashingBusy: If the hashing queue is full.
+    """
+
+    return bool(_run(check_password_hash, password_hash, password))
+
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """Return ``True`` if ``password_hash`` was made with other parameters than configured."""
+
+    return password_hash.split("$", 1)[0] != _method_prefix(_method())
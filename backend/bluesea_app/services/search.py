@@ -0,0 +1,145 @@
+"""Full-text search over posts backed by an SQLite FTS5 index."""
+
+from __future__ import annotations
+
+import html
+import re
+from typing import Final, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+
+from ..db import db
+from ..models import Post
+
+__all__ = [
+    "SearchHit",
+    "build_match_query",
+    "install_search_index",
+    "rebuild_search_index",
+    "search_posts",
+]
+
+# Column weights for bm25(): title, body, tags.
+_RANK_FUNCTION: Final = "bm25(10.0, 1.0, 5.0)"
+_HIGHLIGHT_OPEN: Final = "\x02"
+_HIGHLIGHT_CLOSE: Final = "\x03"
+_TERM_RE: Final = re.compile(r"\w+", re.UNICODE)
+_MAX_TERMS: Final = 16
+
+_DDL: Final = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+    " title, body, tags,"
+    " content='posts', content_rowid='id',"
+    " tokenize='porter unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_after_insert AFTER INSERT ON posts BEGIN"
+    " INSERT INTO posts_fts (rowid, title, body, tags)"
+    " VALUES (new.id, new.title, new.body, new.tags);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_after_delete AFTER DELETE ON posts BEGIN"
+    " INSERT INTO posts_fts (posts_fts, rowid, title, body, tags)"
+    " VALUES ('delete', old.id, old.title, old.body, old.tags);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_after_update AFTER UPDATE OF title, body, tags ON posts BEGIN"
+    " INSERT INTO posts_fts (posts_fts, rowid, title, body, tags)"
+    " VALUES ('delete', old.id, old.title, old.body, old.tags);"
+    " INSERT INTO posts_fts (rowid, title, body, tags)"
+    " VALUES (new.id, new.title, new.body, new.tags);"
+    " END",
+    f"INSERT INTO posts_fts (posts_fts, rank) VALUES ('rank', '{_RANK_FUNCTION}')",
+)
+
+
+class SearchHit(NamedTuple):
+    """A ranked match with HTML-safe highlighted fragments."""
+
+    post_id: int
+    rank: float
+    title_highlight: str
+    snippet: str
+
+
+def install_search_index(connection: Connection) -> None:
+    """Create the FTS5 table and the triggers that keep it in sync with ``posts``."""
+
+    for statement in _DDL:
+        connection.execute(text(statement))
+
+
+def _install_on_create(_target, connection: Connection, **_kwargs) -> None:
+    if connection.dialect.name == "sqlite":
+        install_search_index(connection)
+
+
+# New databases get the index alongside the posts table; existing ones use
+# the ``rebuild-search-index`` command.
+event.listen(Post.__table__, "after_create", _install_on_create)
+
+
+def rebuild_search_index() -> None:
+    """Ensure the index exists and repopulate it from the ``posts`` table."""
+
+    connection = db.session.connection()
+    install_search_index(connection)
+    connection.execute(text("INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')"))
+    db.session.commit()
+
+
+def build_match_query(raw: Optional[str]) -> Optional[str]:
+    """Turn free text into a safe FTS5 query matching every word.
+
+    Each word is quoted so FTS5 operators in user input are treated as plain
+    text. Returns ``None`` when ``raw`` contains no searchable words.
+    """
+
+    terms = _TERM_RE.findall(raw or "")[:_MAX_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def _render_highlight(fragment: Optional[str]) -> str:
+    escaped = html.escape(fragment or "")
+    return escaped.replace(_HIGHLIGHT_OPEN, "<mark>").replace(_HIGHLIGHT_CLOSE, "</mark>")
+
+
+def search_posts(
+    match_query: str, limit: int, after: Optional[Tuple[float, int]] = None
+) -> List[SearchHit]:
+    """Return up to ``limit`` hits ordered by BM25 rank, then post id.
+
+    ``after`` is the ``(rank, post_id)`` key of the last hit on the previous
+    page, so paging seeks instead of re-ranking skipped rows.
+    """
+
+    params = {
+        "query": match_query,
+        "limit": limit,
+        "open": _HIGHLIGHT_OPEN,
+        "close": _HIGHLIGHT_CLOSE,
+    }
+    keyset = ""
+    if after is not None:
+        keyset = " AND (rank > :rank OR (rank = :rank AND rowid > :post_id))"
+        params["rank"], params["post_id"] = after
+
+    rows = db.session.execute(
+        text(
+            "SELECT rowid, rank,"
+            " highlight(posts_fts, 0, :open, :close),"
+            " snippet(posts_fts, 1, :open, :close, '…', 24)"
+            " FROM posts_fts WHERE posts_fts MATCH :query"
+            f"{keyset}"
+            " ORDER BY rank, rowid LIMIT :limit"
+        ),
+        params,
+    ).all()
+    return [
+        SearchHit(
+            post_id=row[0],
+            rank=row[1],
+            title_highlight=_render_highlight(row[2]),
+            snippet=_render_highlight(row[3]),
+        )
+        for row in rows
+    ]
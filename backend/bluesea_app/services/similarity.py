@@ -0,0 +1,195 @@
+"""MinHash signatures used to find near-duplicate posts.
+
+A post's signature holds ``SIGNATURE_SIZE`` MinHash values over the set of
+words in its title and body; the share of positions at which two signatures
+agree estimates the Jaccard similarity of the two word sets. For lookups the
+values are cut into ``LSH_BANDS`` bands of ``LSH_ROWS``, and each band is
+hashed into ``post_similarity_bands``. Posts are only compared when they
+share a band hash: posts with a similarity of 0.7 do so with a probability
+of about 99%, unrelated posts almost never, so finding near-duplicates costs
+a few indexed equality lookups instead of a scan of every post.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import operator
+import random
+import re
+import struct
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from ..db import db
+from ..models import Post, PostSimilarityBand
+
+__all__ = [
+    "LSH_BANDS",
+    "SIGNATURE_SIZE",
+    "NearDuplicateIndex",
+    "Signature",
+    "band_rows",
+    "estimate_similarity",
+    "post_signature",
+]
+
+SIGNATURE_SIZE = 64
+LSH_BANDS = 16
+LSH_ROWS = SIGNATURE_SIZE // LSH_BANDS
+
+_TOKEN_RE = re.compile(r"\w+")
+_PRIME = (1 << 61) - 1
+# Fixed seed: stored signatures are only comparable while these stay the same.
+_PERMUTATIONS = tuple(
+    (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+    for rng in [random.Random(20240601)]
+    for _ in range(SIGNATURE_SIZE)
+)
+# The multipliers split into 30 high and 31 low bits, see ``_word_values``.
+_A_HIGH = np.array([a >> 31 for a, _ in _PERMUTATIONS], dtype=np.uint64)
+_A_LOW = np.array([a & 0x7FFFFFFF for a, _ in _PERMUTATIONS], dtype=np.uint64)
+_B = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)
+# Only the low 16 bits of each value are stored; accidental agreement
+# (1 in 65536 per value) is negligible next to the estimate's own error.
+_PACKED = struct.Struct(f"<{SIGNATURE_SIZE}H")
+_BAND = struct.Struct(f"<B{LSH_ROWS}Q")
+# Chunk size for ``IN`` lists, below SQLite's historical limit of 999 variables.
+_LOOKUP_CHUNK = 500
+
+
+class Signature(NamedTuple):
+    """A post's packed MinHash values and the hashes of its LSH bands."""
+
+    packed: bytes
+    bands: Tuple[int, ...]
+
+
+def _word_values(words: Iterable[str]) -> np.ndarray:
+    """Return the ``(a * x + b) % _PRIME`` permutations of every word's hash ``x``.
+
+    The result has one row per word and one column per permutation. Products
+    of two 61-bit numbers overflow 64 bits, so both factors are split into
+    high and low halves and the partial products folded with
+    ``2 ** 61 == 1 (mod _PRIME)``; every intermediate stays below ``2 ** 64``.
+    """
+
+    x = np.array(
+        [
+            int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little") % _PRIME
+            for word in words
+        ],
+        dtype=np.uint64,
+    )[:, None]
+    x_high, x_low = x >> np.uint64(31), x & np.uint64(0x7FFFFFFF)
+    middle = _A_HIGH * x_low + _A_LOW * x_high
+    total = (
+        (_A_HIGH * x_high << np.uint64(1))
+        + (middle >> np.uint64(30))
+        + ((middle & np.uint64(0x3FFFFFFF)) << np.uint64(31))
+        + _A_LOW * x_low
+        + _B
+    )
+    return total % np.uint64(_PRIME)
+
+
+def _band_hash(band: int, values: Tuple[int, ...]) -> int:
+    digest = hashlib.blake2b(_BAND.pack(band, *values), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+def post_signature(title: str, body: str) -> Optional[Signature]:
+    """Return the signature of a post's title and body.
+
+    Words are case-folded and punctuation is ignored. Returns ``None`` when
+    the text contains no words at all.
+    """
+
+    words = set(_TOKEN_RE.findall(f"{title} {body}".casefold()))
+    if not words:
+        return None
+    values = tuple(_word_values(words).min(axis=0).tolist())
+    bands = tuple(
+        _band_hash(band, values[band * LSH_ROWS : (band + 1) * LSH_ROWS]) for band in range(LSH_BANDS)
+    )
+    return Signature(_PACKED.pack(*(value & 0xFFFF for value in values)), bands)
+
+
+def estimate_similarity(left: bytes, right: bytes) -> float:
+    """Estimate the Jaccard similarity of two packed signatures."""
+
+    return _agreement(_PACKED.unpack(left), _PACKED.unpack(right))
+
+
+def _agreement(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    return sum(map(operator.eq, left, right)) / SIGNATURE_SIZE
+
+
+def band_rows(signatures: Iterable[Tuple[int, Signature]]) -> List[Dict[str, int]]:
+    """Return ``post_similarity_bands`` rows for ``(post_id, signature)`` pairs."""
+
+    return [
+        {"value": value, "post_id": post_id}
+        for post_id, signature in signatures
+        for value in set(signature.bands)
+    ]
+
+
+class NearDuplicateIndex:
+    """Finds the most similar known signature at or above ``threshold``.
+
+    Known signatures are stored posts, loaded with :meth:`preload`, and
+    signatures registered with :meth:`add` (for example earlier items of the
+    same import batch).
+    """
+
+    def __init__(self, threshold: float = 0.7) -> None:
+        self.threshold = float(threshold)
+        # Signatures are kept unpacked so each comparison is a single pass.
+        self._buckets: Dict[int, List[Tuple[Tuple[int, ...], Hashable]]] = {}
+
+    def add(self, signature: Signature, ref: Hashable) -> None:
+        """Register ``signature`` under ``ref``, returned by later matches."""
+
+        values = _PACKED.unpack(signature.packed)
+        for value in set(signature.bands):
+            self._buckets.setdefault(value, []).append((values, ref))
+
+    def preload(self, signatures: Iterable[Signature]) -> None:
+        """Load the stored posts sharing a band with any of ``signatures``.
+
+        Matches against them return the post id as ``ref``.
+        """
+
+        wanted = sorted({value for signature in signatures for value in signature.bands})
+        for start in range(0, len(wanted), _LOOKUP_CHUNK):
+            rows = db.session.execute(
+                select(PostSimilarityBand.value, Post.id, Post.minhash)
+                .join(Post, Post.id == PostSimilarityBand.post_id)
+                .where(PostSimilarityBand.value.in_(wanted[start : start + _LOOKUP_CHUNK]))
+                .order_by(Post.id)
+            )
+            for value, post_id, packed in rows:
+                if packed is not None:
+                    self._buckets.setdefault(value, []).append((_PACKED.unpack(packed), post_id))
+
+    def match(self, signature: Signature) -> Optional[Hashable]:
+        """Return the ``ref`` of the most similar signature, or ``None``.
+
+        Ties go to whichever signature was loaded or added first.
+        """
+
+        values = _PACKED.unpack(signature.packed)
+        best: Optional[Hashable] = None
+        best_similarity = self.threshold
+        compared = set()
+        for value in signature.bands:
+            for candidate, ref in self._buckets.get(value, ()):
+                if ref in compared:
+                    continue
+                compared.add(ref)
+                similarity = _agreement(values, candidate)
+                if similarity >= best_similarity and (best is None or similarity > best_similarity):
+                    best, best_similarity = ref, similarity
+        return best
@@ -2,53 +2,148 @@
 
 from __future__ import annotations
 
+import hashlib
 import os
+import tempfile
 from pathlib import Path
-from typing import Final
-from uuid import uuid4
+from typing import Final, Optional
 
 from werkzeug.datastructures import FileStorage
-from werkzeug.utils import secure_filename
 
-__all__ = ["StorageError", "save_upload"]
+__all__ = ["StorageError", "is_remote_key", "save_upload", "storage_key", "upload_path"]
 
 
 class StorageError(RuntimeError):
     """Raised when a file cannot be saved to storage."""
 
 
-_ALLOWED_MIME_TYPES: Final[frozenset[str]] = frozenset({"image/jpeg", "image/png"})
 _MAX_FILE_SIZE: Final[int] = 10 * 1024 * 1024  # 10MB
+_CHUNK_SIZE: Final[int] = 64 * 1024
+_TEMP_DIRNAME: Final[str] = ".incoming"
+
+# Leading bytes identifying each accepted image format, with its extension.
+_SIGNATURES: Final[tuple[tuple[bytes, str], ...]] = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+)
+_SIGNATURE_LENGTH: Final[int] = max(len(signature) for signature, _ in _SIGNATURES)
+
+
+def is_remote_key(key: str) -> bool:
+    """Return ``True`` if ``key`` is an absolute remote URL rather than an upload path."""
+
+    return key[:8].lower().startswith(("http://", "https://"))
+
+
+def storage_key(image_path: Optional[str], upload_folder: Optional[str]) -> Optional[str]:
+    """Return the canonical key stored in ``Post.image_path``.
+
+    Remote URLs are kept as-is; local files become forward-slash paths
+    relative to ``upload_folder``. Resolving this once at write time lets
+    the serializer build image URLs without touching the filesystem layer.
+
+    Raises:
+        StorageError: If a local path contains ``..`` segments or lies
+            outside ``upload_folder``.
+    """
+
+    path = (image_path or "").strip()
+    if not path:
+        return None
+    if is_remote_key(path):
+        return path
+    if upload_folder and os.path.isabs(path):
+        try:
+            path = os.path.relpath(path, upload_folder)
+        except ValueError:
+            path = os.path.basename(path)
+    key = path.replace("\\", "/").lstrip("/")
+    if ".." in key.split("/"):
+        raise StorageError("Image paths must stay inside the upload folder.")
+    return key
+
+
+def upload_path(upload_folder: str, key: str) -> Path:
+    """Return the absolute filesystem path of the local storage ``key``.
+
+    Both paths are resolved, symlinks included, before they are compared.
+
+    Raises:
+        StorageError: If ``key`` does not resolve to a path below ``upload_folder``.
+    """
+
+    root = Path(upload_folder).resolve()
+    path = (root / key).resolve()
+    if path == root or not path.is_relative_to(root):
+        raise StorageError("Image paths must stay inside the upload folder.")
+    return path
 
 
 def _validate_file(file_storage: FileStorage) -> None:
     if not file_storage:
         raise StorageError("No file provided for upload.")
 
-    if not file_storage.mimetype:
-        raise StorageError("Could not determine the file's MIME type.")
 
-    if file_storage.mimetype not in _ALLOWED_MIME_TYPES:
-        raise StorageError("Unsupported media type. Only JPEG and PNG images are allowed.")
+def _detect_extension(header: bytes) -> str:
+    for signature, extension in _SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    raise StorageError("Unsupported media type. Only JPEG and PNG images are allowed.")
 
-    filename = secure_filename(file_storage.filename or "")
-    if not filename:
-        raise StorageError("The uploaded file must have a valid filename.")
 
+def _shard_path(upload_path: Path, digest: str, extension: str) -> Path:
+    return upload_path / digest[:2] / digest[2:4] / f"{digest}{extension}"
 
-def _enforce_size_limit(file_storage: FileStorage) -> None:
-    current_position = file_storage.stream.tell()
-    file_storage.stream.seek(0, os.SEEK_END)
-    size = file_storage.stream.tell()
-    file_storage.stream.seek(current_position)
 
-    if size > _MAX_FILE_SIZE:
-        raise StorageError("File exceeds the maximum allowed size of 10 MB.")
+def _stream_to_temp(file_storage: FileStorage, temp_dir: Path) -> tuple[Path, str, str]:
+    """Copy the upload to a temporary file in one pass.
+
+    The content is hashed and measured while it is written, the format is
+    checked from the leading bytes, and the copy stops as soon as the size
+    limit is crossed. Returns the temporary path, hex digest and extension.
+    """
+
+    digest = hashlib.sha256()
+    size = 0
+    header = b""
+    extension: Optional[str] = None
+
+    handle = tempfile.NamedTemporaryFile(dir=temp_dir, delete=False)
+    temp_path = Path(handle.name)
+    try:
+        with handle:
+            while True:
+                chunk = file_storage.stream.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > _MAX_FILE_SIZE:
+                    raise StorageError("File exceeds the maximum allowed size of 10 MB.")
+                if extension is None:
+                    header += chunk[: _SIGNATURE_LENGTH - len(header)]
+                    if len(header) >= _SIGNATURE_LENGTH:
+                        extension = _detect_extension(header)
+                digest.update(chunk)
+                handle.write(chunk)
+        if extension is None:
+            extension = _detect_extension(header)
+    except OSError as exc:
+        temp_path.unlink(missing_ok=True)
+        raise StorageError("Failed to save the uploaded file.") from exc
+    except StorageError:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    return temp_path, digest.hexdigest(), extension
 
 
 def save_upload(file_storage: FileStorage, upload_folder: str) -> str:
     """Persist an uploaded file to the configured storage location.
 
+    Files are stored content-addressed as ``ab/cd/<sha256>.<ext>`` below
+    ``upload_folder``, so identical uploads share one file and no directory
+    grows too large to list quickly.
+
     Args:
         file_storage: The Werkzeug ``FileStorage`` instance to save.
         upload_folder: Absolute path to the directory where files are stored.
@@ -61,22 +156,25 @@ def save_upload(file_storage: FileStorage, upload_folder: str) -> str:
     """
 
     _validate_file(file_storage)
-    _enforce_size_limit(file_storage)
 
     upload_path = Path(upload_folder)
+    temp_dir = upload_path / _TEMP_DIRNAME
     try:
-        upload_path.mkdir(parents=True, exist_ok=True)
+        temp_dir.mkdir(parents=True, exist_ok=True)
     except OSError as exc:  # pragma: no cover - unlikely but defensive
         raise StorageError("Unable to prepare the upload directory.") from exc
 
-    original_name = secure_filename(file_storage.filename or "upload")
-    extension = Path(original_name).suffix
-    unique_name = f"{uuid4().hex}{extension}"
-    destination = upload_path / unique_name
+    temp_path, digest, extension = _stream_to_temp(file_storage, temp_dir)
+    destination = _shard_path(upload_path, digest, extension)
 
     try:
-        file_storage.save(destination)
+        if destination.exists():
+            temp_path.unlink()
+        else:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, destination)
     except OSError as exc:
+        temp_path.unlink(missing_ok=True)
         raise StorageError("Failed to save the uploaded file.") from exc
 
     return str(destination)
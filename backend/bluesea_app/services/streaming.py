@@ -0,0 +1,139 @@
+"""Incremental decoders for large JSON request bodies."""
+
+from __future__ import annotations
+
+import codecs
+import json
+from typing import IO, Any, Final, Iterator, Optional, Tuple
+
+__all__ = ["StreamRecord", "iter_ndjson", "iter_json_array"]
+
+_READ_SIZE: Final[int] = 64 * 1024
+_MAX_RECORD_SIZE: Final[int] = 1024 * 1024  # 1MB per record
+
+# ``(position, value, error)`` where ``position`` is the 1-based line number
+# for NDJSON or the 0-based array index for JSON arrays. Exactly one of
+# ``value``/``error`` is meaningful; ``error`` is ``None`` on success.
+StreamRecord = Tuple[int, Any, Optional[str]]
+
+
+def iter_ndjson(stream: IO[bytes]) -> Iterator[StreamRecord]:
+    """Yield one record per non-blank line of a newline-delimited JSON stream.
+
+    Lines that are not valid JSON are reported through the ``error`` slot and
+    do not stop the iteration.
+    """
+
+    line_number = 0
+    while True:
+        raw = stream.readline(_MAX_RECORD_SIZE + 1)
+        if not raw:
+            return
+        line_number += 1
+        if len(raw) > _MAX_RECORD_SIZE and not raw.endswith(b"\n"):
+            # Drain the rest of the oversized line before reporting it.
+            while raw and not raw.endswith(b"\n"):
+                raw = stream.readline(_MAX_RECORD_SIZE)
+            yield line_number, None, "Line exceeds the maximum record size of 1 MB."
+            continue
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+            yield line_number, None, f"Invalid JSON: {exc}"
+
+
+class _ArrayReader:
+    """Buffered character reader backing :func:`iter_json_array`."""
+
+    def __init__(self, stream: IO[bytes]) -> None:
+        self._stream = stream
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self._stream.read(_READ_SIZE)
+        if not chunk:
+            self.eof = True
+            self.buffer = self.buffer[self.pos :] + self._decoder.decode(b"", final=True)
+        else:
+            self.buffer = self.buffer[self.pos :] + self._decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, token: str) -> None:
+        if self.peek() != token:
+            raise ValueError(f"Expected '{token}' in JSON stream.")
+        self.pos += 1
+
+    def decode_value(self, decoder: json.JSONDecoder) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as exc:
+                if len(self.buffer) - self.pos > _MAX_RECORD_SIZE:
+                    raise ValueError("Record exceeds the maximum record size of 1 MB.") from exc
+                if not self.fill():
+                    raise ValueError(f"Invalid JSON: {exc}") from exc
+                continue
+            # A number at the end of the buffer may continue in the next chunk.
+            if end == len(self.buffer) and not self.eof:
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(stream: IO[bytes]) -> Iterator[StreamRecord]:
+    """Yield the items of a JSON array without reading the whole body.
+
+    Accepts either a top-level array or an object whose first key is
+    ``"posts"`` holding the array. Structural errors cannot be resynchronised,
+    so the first one is reported through the ``error`` slot and ends the
+    iteration.
+    """
+
+    reader = _ArrayReader(stream)
+    decoder = json.JSONDecoder()
+    index = 0
+    try:
+        opening = reader.peek()
+        if opening == "{":
+            reader.pos += 1
+            if reader.peek() != '"' or reader.decode_value(decoder) != "posts":
+                raise ValueError("Streamed JSON objects must start with the 'posts' key.")
+            reader.expect(":")
+        elif opening != "[":
+            raise ValueError("Payload must be a JSON array or an object with a 'posts' array.")
+        reader.expect("[")
+
+        if reader.peek() == "]":
+            return
+        while True:
+            value = reader.decode_value(decoder)
+            yield index, value, None
+            index += 1
+            token = reader.peek()
+            if token == "]":
+                return
+            if token != ",":
+                raise ValueError("Expected ',' or ']' between array items.")
+            reader.pos += 1
+    except ValueError as exc:
+        yield index, None, str(exc)
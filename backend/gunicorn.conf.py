@@ -0,0 +1,67 @@
+"""Gunicorn settings for serving ``wsgi:app`` in production.
+
+Every value can be overridden through the environment variable named next to
+it. The app is preloaded in the master so workers fork from an imported,
+configured application instead of importing it again. Workers use threads
+because most request time is spent in SQLite and in the password and image
+pools, all of which release the GIL. Workers are recycled after
+``max_requests`` so that slow leaks cannot accumulate.
+"""
+
+import glob
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", str(min(multiprocessing.cpu_count() * 2 + 1, 9))))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in {"1", "true", "yes"}
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+# The import classifier and image derivative process pools are per worker and
+# start on first use, so a busy server runs up to ``workers`` times
+# IMPORT_CLASSIFY_PROCESSES plus ``workers`` times IMAGE_DERIVATIVE_PROCESSES
+# processes next to the workers themselves. Unless they are set explicitly,
+# the classifier pools share the CPUs between the workers (two processes at
+# least, below which the pool is not used) and each worker gets one image
+# process.
+os.environ.setdefault(
+    "IMPORT_CLASSIFY_PROCESSES", str(max(2, multiprocessing.cpu_count() // workers))
+)
+os.environ.setdefault("IMAGE_DERIVATIVE_PROCESSES", "1")
+
+
+def on_starting(server):
+    """Start each deployment with empty metrics snapshots."""
+
+    metrics_dir = os.getenv("METRICS_DIR")
+    if metrics_dir:
+        for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+            os.unlink(path)
+
+
+def child_exit(server, worker):
+    """Fold an exited worker's metrics snapshot into the shared archive."""
+
+    metrics_dir = os.getenv("METRICS_DIR")
+    if metrics_dir:
+        from bluesea_app.services.metrics import archive_snapshot
+
+        archive_snapshot(metrics_dir, worker.pid)
+
+
+def post_fork(server, worker):
+    """Make sure workers never reuse database connections opened by the master."""
+
+    if server.cfg.preload_app:
+        from bluesea_app.db import dispose_engines
+        from wsgi import app
+
+        dispose_engines(app)
@@ -0,0 +1,78 @@
+"""Shared fixtures for the BlueSea backend tests."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional
+
+import pytest
+from sqlalchemy import event
+
+from bluesea_app import create_app
+from bluesea_app.db import db
+from bluesea_app.models import Post, User
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app("bluesea_app.config.TestConfig")
+    app.config["UPLOAD_FOLDER"] = str(tmp_path / "uploads")
+    app.config["IMPORT_JOB_FOLDER"] = str(tmp_path / "import_jobs")
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-that-is-long-enough"
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@contextmanager
+def _count_queries() -> Iterator[List[str]]:
+    statements: List[str] = []
+
+    def record(_conn, _cursor, statement, _parameters, _context, _executemany) -> None:
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+
+@pytest.fixture()
+def count_queries(app):
+    """Return a context manager collecting the SQL statements run inside it."""
+
+    return _count_queries
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture()
+def make_posts(app):
+    """Insert ``count`` posts spread over ``authors`` users and return their ids."""
+
+    def factory(
+        count: int, authors: int = 1, tags: Optional[Iterable[str]] = None, source: str = "community"
+    ) -> List[int]:
+        first = User.query.count()
+        users = [User(email=f"author{first + index}", password_hash="unused") for index in range(authors)]
+        db.session.add_all(users)
+        posts = []
+        for index in range(count):
+            post = Post(
+                title=f"Reef survey {index}",
+                body=f"Notes from dive {index}.",
+                source=source,
+                author=users[index % authors],
+            )
+            post.set_tags(list(tags or []))
+            posts.append(post)
+        db.session.add_all(posts)
+        db.session.commit()
+        return [post.id for post in posts]
+
+    return factory
@@ -0,0 +1,93 @@
+"""Tests for sign-in and the cached JWT identity lookup."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from bluesea_app.db import db
+from bluesea_app.models import User
+from bluesea_app.services.identity import get_identity_cache
+from bluesea_app.services.passwords import PasswordHashingBusy, _HashingPool
+
+
+def _register(client, username: str = "diver") -> dict:
+    response = client.post("/api/auth/register", json={"username": username, "password": "password123"})
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def _me(client, token: str):
+    return client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_me_on_a_warm_identity_cache_does_not_query_users(client, count_queries):
+    token = _register(client)["access_token"]
+    assert _me(client, token).status_code == 200
+
+    with count_queries() as statements:
+        response = _me(client, token)
+
+    assert response.status_code == 200
+    assert response.get_json()["user"]["username"] == "diver"
+    assert not [statement for statement in statements if "users" in statement]
+    assert get_identity_cache().stats()["hits"] >= 1
+
+
+def test_updating_a_user_evicts_the_cached_identity(client):
+    payload = _register(client)
+    token, user_id = payload["access_token"], payload["user"]["id"]
+    _me(client, token)
+    assert get_identity_cache().peek(user_id) is not None
+
+    db.session.get(User, user_id).is_admin = True
+    db.session.commit()
+
+    assert get_identity_cache().peek(user_id) is None
+    assert _me(client, token).get_json()["user"]["is_admin"] is True
+
+
+def test_deleting_a_user_evicts_the_cached_identity(client):
+    payload = _register(client)
+    token, user_id = payload["access_token"], payload["user"]["id"]
+    _me(client, token)
+
+    db.session.delete(db.session.get(User, user_id))
+    db.session.commit()
+
+    assert get_identity_cache().peek(user_id) is None
+    assert _me(client, token).status_code == 404
+
+
+def test_login_rehashes_a_legacy_password_hash(client):
+    user = User(email="diver", password_hash=generate_password_hash("password123", method="pbkdf2:sha256:500"))
+    db.session.add(user)
+    db.session.commit()
+
+    response = client.post("/api/auth/login", json={"username": "diver", "password": "password123"})
+
+    assert response.status_code == 200
+    rehashed = db.session.get(User, user.id).password_hash
+    assert rehashed.startswith("pbkdf2:sha256:1000$")
+    assert client.post("/api/auth/login", json={"username": "diver", "password": "password123"}).status_code == 200
+
+
+def test_hashing_pool_rejects_work_beyond_its_queue():
+    pool = _HashingPool(workers=1, queue_limit=0, timeout=0)
+    started, release = threading.Event(), threading.Event()
+
+    def block() -> None:
+        started.set()
+        release.wait()
+
+    worker = threading.Thread(target=pool.run, args=(block,))
+    worker.start()
+    started.wait()
+    try:
+        with pytest.raises(PasswordHashingBusy):
+            pool.run(len, "x")
+    finally:
+        release.set()
+        worker.join()
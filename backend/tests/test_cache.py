@@ -0,0 +1,40 @@
+"""Tests for the in-process LRU and TTL caches."""
+
+from __future__ import annotations
+
+from bluesea_app.services import cache as cache_module
+from bluesea_app.services.cache import CachedResponse, LRUResponseCache, TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache: TTLCache[int, str] = TTLCache(max_entries=2, ttl=60)
+    cache.set(1, "one")
+    cache.set(2, "two")
+    assert cache.get(1) == "one"
+
+    assert cache.set(3, "three") == 1
+    assert cache.get(2) is None
+    assert cache.get(1) == "one"
+    assert len(cache) == 2
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache: TTLCache[str, int] = TTLCache(ttl=5)
+    cache.set("key", 1)
+    assert cache.get("key") == 1
+
+    now[0] += 5
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_lru_response_cache_counts_evictions():
+    cache = LRUResponseCache(max_entries=1, ttl=60)
+    cache.set("a", CachedResponse(body=b"a", etag="a", mimetype="application/json"))
+    cache.set("b", CachedResponse(body=b"b", etag="b", mimetype="application/json"))
+
+    assert cache.get("a") is None
+    assert cache.get("b").body == b"b"
+    assert cache.stats()["evictions"] == 1
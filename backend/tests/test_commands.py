@@ -0,0 +1,30 @@
+"""Tests for the maintenance commands registered on the ``flask`` CLI."""
+
+from __future__ import annotations
+
+from sqlalchemy import text
+
+from bluesea_app.db import db
+
+
+def test_commands_are_registered_on_first_use(app):
+    result = app.test_cli_runner().invoke(args=["--help"])
+
+    assert result.exit_code == 0
+    assert "init-db" in result.output
+    assert "backfill-tags" in result.output
+
+
+def test_backfill_commands_require_init_db(app):
+    db.session.execute(text("DROP TABLE post_counters"))
+    db.session.commit()
+    runner = app.test_cli_runner()
+
+    refused = runner.invoke(args=["reconcile-counters"])
+    assert refused.exit_code == 1
+    assert "run `flask init-db` first" in refused.output
+
+    assert runner.invoke(args=["init-db"]).exit_code == 0
+    accepted = runner.invoke(args=["reconcile-counters"])
+    assert accepted.exit_code == 0
+    assert "Rebuilt 1 post counters." in accepted.output
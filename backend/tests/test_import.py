@@ -0,0 +1,171 @@
+"""Tests for the mock import endpoint, its streaming modes and background jobs."""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bluesea_app.commands import fail_stale_import_jobs
+from bluesea_app.db import db
+from bluesea_app.models import ImportJob, Post, PostSimilarityBand
+from bluesea_app.schema import backfill_content_hashes
+
+REEF = {
+    "title": "Coral reef bleaching survey",
+    "body": "Divers counted bleached coral colonies along the outer reef after the marine heatwave.",
+    "source": "noaa",
+    "tags": ["reef"],
+}
+# Shares all but one word with REEF.
+REEF_REWORDED = dict(REEF, body=REEF["body"].replace("Divers", "Volunteers"))
+KELP = {
+    "title": "Kelp forest recovery",
+    "body": "Sea otters are back in the kelp forest and urchin numbers in the bay have fallen.",
+    "source": "noaa",
+}
+
+
+def test_exact_duplicates_are_counted_not_inserted(client):
+    first = client.post("/api/import/mock", json={"posts": [REEF, dict(REEF), KELP]})
+    assert first.status_code == 201
+    assert first.get_json()["inserted"] == 2
+    assert first.get_json()["duplicates"] == 1
+
+    again = client.post("/api/import/mock", json={"posts": [REEF]})
+    assert again.status_code == 200
+    assert again.get_json()["inserted"] == 0
+    assert again.get_json()["duplicates"] == 1
+    assert db.session.query(Post).count() == 2
+
+
+def test_near_duplicates_are_skipped(client):
+    client.post("/api/import/mock", json={"posts": [REEF]})
+
+    response = client.post("/api/import/mock", json={"posts": [REEF_REWORDED, KELP]})
+
+    assert response.status_code == 201
+    assert response.get_json()["inserted"] == 1
+    assert response.get_json()["nearDuplicates"] == 1
+    assert {post.title for post in Post.query} == {REEF["title"], KELP["title"]}
+
+
+def test_near_duplicates_are_linked_when_configured(app, client):
+    app.config["IMPORT_NEAR_DUPLICATES"] = "link"
+
+    response = client.post("/api/import/mock", json={"posts": [REEF, REEF_REWORDED]})
+
+    assert response.status_code == 201
+    assert response.get_json()["inserted"] == 2
+    original, copy = Post.query.order_by(Post.id).all()
+    assert original.duplicate_of_id is None
+    assert copy.duplicate_of_id == original.id
+    assert client.get(f"/api/posts/{copy.id}").get_json()["post"]["duplicate_of"] == original.id
+
+
+def test_non_marine_posts_are_skipped(client):
+    response = client.post(
+        "/api/import/mock", json={"posts": [{"title": "Stock market update", "body": "Shares fell today."}]}
+    )
+
+    assert response.status_code == 204
+
+
+def test_async_import_bodies_over_the_limit_are_rejected(app, client):
+    app.config["IMPORT_MAX_BODY_SIZE"] = 100
+
+    response = client.post("/api/import/mock?async=1", json={"posts": [REEF, KELP]})
+
+    assert response.status_code == 413
+    assert response.get_json()["error"] == "payload_too_large"
+    assert ImportJob.query.count() == 0
+    assert not any(Path(app.config["IMPORT_JOB_FOLDER"]).glob("*.body"))
+
+
+def test_fail_stale_import_jobs_marks_unfinished_jobs_failed(app, tmp_path):
+    payload = tmp_path / "job.body"
+    payload.write_text("[]")
+    db.session.add_all(
+        [
+            ImportJob(id="queued", content_type="application/json", payload_path=str(payload)),
+            ImportJob(id="running", content_type="application/json", payload_path="missing", status="running"),
+            ImportJob(id="done", content_type="application/json", payload_path="gone", status="succeeded"),
+            ImportJob(
+                id="recent",
+                content_type="application/json",
+                payload_path="recent",
+                created_at=datetime.utcnow() + timedelta(minutes=5),
+            ),
+        ]
+    )
+    db.session.commit()
+
+    assert fail_stale_import_jobs() == 2
+    statuses = dict(db.session.query(ImportJob.id, ImportJob.status))
+    assert statuses == {"queued": "failed", "running": "failed", "done": "succeeded", "recent": "queued"}
+    assert not payload.exists()
+
+
+def test_backfilled_content_hashes_block_reimports(client):
+    db.session.add_all(
+        [
+            Post(title=REEF["title"], body=REEF["body"], source="noaa", user_id=1),
+            Post(title=REEF["title"], body=REEF["body"], source="noaa", user_id=1),
+        ]
+    )
+    db.session.commit()
+
+    assert backfill_content_hashes() == 1
+    assert [post.content_hash is not None for post in Post.query.order_by(Post.id)] == [True, False]
+
+    response = client.post("/api/import/mock", json={"posts": [REEF]})
+    assert response.status_code == 200
+    assert response.get_json()["duplicates"] == 1
+
+
+def test_deleting_a_post_removes_its_similarity_bands(client):
+    client.post("/api/import/mock", json={"posts": [REEF]})
+    post = Post.query.one()
+    assert PostSimilarityBand.query.filter_by(post_id=post.id).count() > 0
+
+    db.session.delete(post)
+    db.session.commit()
+
+    assert PostSimilarityBand.query.count() == 0
+
+
+def test_ndjson_import_reports_errors_per_line(client):
+    body = "\n".join([json.dumps(REEF), "{not json", "", json.dumps(KELP), json.dumps({"body": "No title"})])
+
+    response = client.post("/api/import/mock", data=body, content_type="application/x-ndjson")
+
+    assert response.status_code == 201
+    payload = response.get_json()
+    assert payload["inserted"] == 2
+    assert payload["processed"] == 4
+    assert payload["errorCount"] == 2
+    assert [error["line"] for error in payload["errors"]] == [2, 5]
+
+
+def test_streamed_array_import_stops_at_a_malformed_array(client):
+    body = "[" + json.dumps(REEF) + ", " + json.dumps(KELP) + ' {"title": "Lost"}]'
+
+    response = client.post("/api/import/mock?stream=1", data=body, content_type="application/json")
+
+    assert response.status_code == 201
+    payload = response.get_json()
+    assert payload["inserted"] == 2
+    assert payload["errorCount"] == 1
+    assert payload["errors"][0]["index"] == 2
+    assert "Expected ','" in payload["errors"][0]["message"]
+
+
+def test_streamed_import_bodies_over_the_limit_are_rejected(app, client):
+    app.config["IMPORT_MAX_BODY_SIZE"] = 100
+    body = "\n".join(json.dumps(post) for post in (REEF, KELP))
+
+    response = client.post("/api/import/mock", data=body, content_type="application/x-ndjson")
+
+    assert response.status_code == 413
+    assert response.get_json()["error"] == "payload_too_large"
+    assert Post.query.count() == 0
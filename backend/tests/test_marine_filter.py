@@ -0,0 +1,28 @@
+"""Tests for the marine keyword matcher."""
+
+from __future__ import annotations
+
+import pytest
+
+from bluesea_app.services.marine_filter import MarineMatcher
+
+
+@pytest.fixture()
+def matcher():
+    return MarineMatcher(["bay", "beach", "fish", "whale"])
+
+
+@pytest.mark.parametrize("text", ["Whales in the bay", "Two BAYS", "sandy beaches", "fishes and fish"])
+def test_keywords_and_their_plurals_match(matcher, text):
+    assert matcher.matches(text)
+
+
+@pytest.mark.parametrize("text", ["Bayes theorem", "bought on ebay", "beachs", "bayside"])
+def test_other_words_do_not_match(matcher, text):
+    assert not matcher.matches(text)
+
+
+def test_findall_maps_plurals_back_to_keywords(matcher):
+    found = matcher.findall("Whales and beaches by the bay")
+
+    assert [matcher.forms[word] for word in found] == ["whale", "beach", "bay"]
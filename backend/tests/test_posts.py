@@ -0,0 +1,326 @@
+"""Tests for the post endpoints, their pagination and response caching."""
+
+from __future__ import annotations
+
+import io
+from typing import List, Tuple
+
+from bluesea_app.api.posts import _BATCH_LIMIT
+from bluesea_app.commands import backfill_relevance_scores
+from bluesea_app.db import db
+from bluesea_app.models import Post, User
+from bluesea_app.services.cache import get_response_cache
+from bluesea_app.services.counters import get_post_stats, reconcile_post_counters
+
+
+def test_list_posts_query_count_does_not_grow_with_page_size(client, make_posts, count_queries):
+    make_posts(60, authors=10, tags=["reef", "coral"])
+
+    counts = {}
+    for limit in (1, 50):
+        with count_queries() as statements:
+            response = client.get(f"/api/posts?limit={limit}")
+        assert response.status_code == 200
+        assert len(response.get_json()["items"]) == limit
+        counts[limit] = len(statements)
+
+    assert counts[1] == counts[50]
+
+
+def test_cursor_pagination_returns_every_post_once(client, make_posts):
+    ids = make_posts(25)
+
+    seen = []
+    url = "/api/posts?limit=10"
+    while True:
+        payload = client.get(url).get_json()
+        seen.extend(item["id"] for item in payload["items"])
+        if not payload["nextCursor"]:
+            break
+        url = f"/api/posts?limit=10&cursor={payload['nextCursor']}"
+
+    assert sorted(seen) == sorted(ids)
+    assert len(seen) == len(set(seen))
+
+
+def test_invalid_cursor_is_rejected(client, make_posts):
+    make_posts(1)
+
+    response = client.get("/api/posts?cursor=not-a-cursor")
+
+    assert response.status_code == 400
+
+
+def test_list_posts_is_cached_and_revalidated_with_etag(client, make_posts):
+    make_posts(3, tags=["reef"])
+
+    first = client.get("/api/posts")
+    second = client.get("/api/posts")
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert first.headers["ETag"] == second.headers["ETag"]
+
+    revalidated = client.get("/api/posts", headers={"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+
+
+def test_creating_a_post_invalidates_cached_lists(app, client, make_posts):
+    make_posts(2)
+    before = client.get("/api/posts")
+
+    registered = client.post("/api/auth/register", json={"username": "diver", "password": "password123"})
+    token = registered.get_json()["access_token"]
+    created = client.post(
+        "/api/posts",
+        data={"title": "Kelp forest", "body": "Sea otters in the kelp.", "tags": "kelp"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert created.status_code == 201
+
+    after = client.get("/api/posts")
+    assert after.headers["X-Cache"] == "MISS"
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert after.get_json()["items"][0]["title"] == "Kelp forest"
+
+
+def test_filter_by_tag(client, make_posts):
+    make_posts(3, tags=["reef"])
+    make_posts(2, tags=["kelp"])
+
+    payload = client.get("/api/posts?tag=kelp").get_json()
+
+    assert len(payload["items"]) == 2
+    assert all(item["tags"] == ["kelp"] for item in payload["items"])
+
+
+def test_oversized_uploads_are_rejected_before_reading(app, client):
+    app.config["MAX_CONTENT_LENGTH"] = 1024
+    registered = client.post("/api/auth/register", json={"username": "diver", "password": "password123"})
+    token = registered.get_json()["access_token"]
+
+    response = client.post(
+        "/api/posts",
+        data={
+            "title": "Kelp forest",
+            "body": "Sea otters.",
+            "image": (io.BytesIO(b"\xff\xd8\xff" + b"0" * 4096), "kelp.jpg"),
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 413
+    assert response.get_json()["error"] == "payload_too_large"
+
+
+def test_cached_responses_are_kept_per_host(app, client, make_posts):
+    ids = make_posts(1)
+    with app.app_context():
+        db.session.get(Post, ids[0]).image_path = "ab/cd/reef.png"
+        db.session.commit()
+
+    first = client.get("/api/posts", base_url="http://api.example.org")
+    second = client.get("/api/posts", base_url="https://cdn.example.org")
+
+    assert second.headers["X-Cache"] == "MISS"
+    assert first.get_json()["items"][0]["image_url"].startswith("http://api.example.org/")
+    assert second.get_json()["items"][0]["image_url"].startswith("https://cdn.example.org/")
+
+
+def test_compressed_variants_do_not_skew_cache_stats(app, client, make_posts):
+    make_posts(30, tags=["reef"])
+    cache = get_response_cache()
+
+    for _ in range(3):
+        response = client.get("/api/posts", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def _add_posts(*posts: Tuple[str, str]) -> List[int]:
+    author = User(email=f"writer{User.query.count()}", password_hash="unused")
+    rows = [Post(title=title, body=body, source="community", author=author) for title, body in posts]
+    db.session.add_all(rows)
+    db.session.commit()
+    return [row.id for row in rows]
+
+
+def test_search_ranks_posts_by_bm25(client):
+    often, once, _ = _add_posts(
+        ("Whale watching", "A whale, then another whale, then a whale calf."),
+        ("Harbour news", "The ferry timetable changes and a whale was seen."),
+        ("Kelp forest", "Sea otters and urchins."),
+    )
+
+    payload = client.get("/api/posts/search?q=whale").get_json()
+
+    assert [item["id"] for item in payload["items"]] == [often, once]
+
+
+def test_search_highlights_matches_and_escapes_html(client):
+    _add_posts(("Whale <b>alert</b>", "Humpback whale off the <i>point</i> this morning."))
+
+    item = client.get("/api/posts/search?q=whale").get_json()["items"][0]
+
+    assert item["highlight"]["title"] == "<mark>Whale</mark> &lt;b&gt;alert&lt;/b&gt;"
+    assert "Humpback <mark>whale</mark> off the &lt;i&gt;point&lt;/i&gt;" in item["highlight"]["body"]
+
+
+def test_search_pages_with_rank_cursor(client):
+    ids = _add_posts(
+        *[("Reef dive", "Reef fish on the reef wall.")] * 3,
+        *[("Reef notes", "One reef visit.")] * 3,
+    )
+    expected = [item["id"] for item in client.get("/api/posts/search?q=reef&limit=50").get_json()["items"]]
+
+    seen = []
+    url = "/api/posts/search?q=reef&limit=2"
+    while url:
+        payload = client.get(url).get_json()
+        seen.extend(item["id"] for item in payload["items"])
+        url = payload["nextCursor"] and f"/api/posts/search?q=reef&limit=2&cursor={payload['nextCursor']}"
+
+    assert seen == expected
+    assert sorted(seen) == sorted(ids)
+
+
+def test_search_rejects_a_bad_cursor_or_missing_query(client):
+    _add_posts(("Reef dive", "Reef fish."))
+
+    bad_cursor = client.get("/api/posts/search?q=reef&cursor=not-a-cursor")
+    assert bad_cursor.status_code == 400
+    assert bad_cursor.get_json()["error"] == "invalid_cursor"
+    assert client.get("/api/posts/search?q=").status_code == 400
+
+
+def test_post_stats_follow_imports_and_new_posts(client):
+    client.post(
+        "/api/import/mock",
+        json={
+            "posts": [
+                {"title": "Reef survey", "body": "Coral reef transects.", "source": "noaa", "tags": ["reef"]},
+                {"title": "Kelp survey", "body": "Kelp in the bay.", "source": "noaa", "tags": ["kelp", "reef"]},
+            ]
+        },
+    )
+    registered = client.post("/api/auth/register", json={"username": "diver", "password": "password123"})
+    token = registered.get_json()["access_token"]
+    client.post(
+        "/api/posts",
+        data={"title": "Night dive", "body": "Octopus on the reef.", "tags": "reef"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    stats = client.get("/api/posts/stats").get_json()
+
+    assert stats["total"] == 3
+    assert stats["sources"]["noaa"] == 2
+    assert sum(stats["sources"].values()) == 3
+    assert stats["tags"] == {"reef": 3, "kelp": 1}
+
+
+def test_reconcile_post_counters_rebuilds_counts_from_posts(make_posts):
+    make_posts(3, tags=["reef", "coral"], source="noaa")
+    make_posts(2, tags=["kelp"])
+    assert get_post_stats()["total"] == 0
+
+    reconcile_post_counters()
+
+    assert get_post_stats() == {
+        "total": 5,
+        "sources": {"noaa": 3, "community": 2},
+        "tags": {"coral": 3, "reef": 3, "kelp": 2},
+    }
+
+
+def test_author_feed_pages_through_one_users_posts(client, make_posts):
+    ids = make_posts(7)
+    make_posts(3)
+    author_id = db.session.get(Post, ids[0]).user_id
+
+    seen = []
+    url = f"/api/users/{author_id}/posts?limit=3"
+    while url:
+        payload = client.get(url).get_json()
+        assert all(item["user"]["id"] == author_id for item in payload["items"])
+        seen.extend(item["id"] for item in payload["items"])
+        url = payload["nextCursor"] and f"/api/users/{author_id}/posts?limit=3&cursor={payload['nextCursor']}"
+
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_author_feed_of_an_unknown_user_is_404(client):
+    response = client.get("/api/users/9999/posts")
+
+    assert response.status_code == 404
+    assert response.get_json()["error"] == "user_not_found"
+
+
+def test_batch_get_keeps_requested_order_and_lists_missing_ids(client, make_posts):
+    first, second, third = make_posts(3)
+
+    by_query = client.get(f"/api/posts?ids={third},9999,{first},{third}").get_json()
+    by_body = client.post("/api/posts/batch", json={"ids": [third, 9999, first]}).get_json()
+
+    for payload in (by_query, by_body):
+        assert [item["id"] for item in payload["items"]] == [third, first]
+        assert payload["missing"] == [9999]
+    assert second not in [item["id"] for item in by_body["items"]]
+
+
+def test_batch_get_rejects_invalid_or_too_many_ids(client, make_posts):
+    make_posts(1)
+    too_many = list(range(1, _BATCH_LIMIT + 2))
+
+    responses = [
+        client.post("/api/posts/batch", json={"ids": too_many}),
+        client.get("/api/posts?ids=" + ",".join(map(str, too_many))),
+        client.post("/api/posts/batch", json={"ids": ["one"]}),
+        client.post("/api/posts/batch", json={"ids": []}),
+        client.get("/api/posts?ids=0"),
+    ]
+
+    assert [response.status_code for response in responses] == [400] * 5
+    assert all(response.get_json()["error"] == "invalid_ids" for response in responses)
+    assert client.post("/api/posts/batch", json={"ids": too_many[:-1]}).status_code == 200
+
+
+def test_sort_by_relevance_pages_scored_posts_before_unscored(client, make_posts):
+    ids = make_posts(7)
+    scores = dict(zip(ids, [0.5, None, 2.0, 0.5, None, 1.25, 0.5]))
+    for post_id, score in scores.items():
+        db.session.get(Post, post_id).relevance = score
+    db.session.commit()
+    expected = sorted(ids, key=lambda post_id: (scores[post_id] is None, -(scores[post_id] or 0), -post_id))
+
+    seen = []
+    url = "/api/posts?sort=relevance&limit=2"
+    while url:
+        payload = client.get(url).get_json()
+        seen.extend(item["id"] for item in payload["items"])
+        url = payload["nextCursor"] and f"/api/posts?sort=relevance&limit=2&cursor={payload['nextCursor']}"
+
+    assert seen == expected
+
+
+def test_relevance_scores_rank_marine_posts(client):
+    reef, harbour, office = _add_posts(
+        ("Reef survey", "Coral reef and whale sightings along the reef."),
+        ("Harbour news", "The ferry now stops near the bay."),
+        ("Office party", "Cake in the meeting room."),
+    )
+    backfill_relevance_scores()
+
+    items = client.get("/api/posts?sort=relevance").get_json()["items"]
+
+    assert [item["id"] for item in items] == [reef, harbour, office]
+    assert db.session.get(Post, office).relevance == 0
+
+
+def test_sort_by_relevance_rejects_a_recency_cursor(client, make_posts):
+    make_posts(3)
+    cursor = client.get("/api/posts?limit=1").get_json()["nextCursor"]
+
+    assert client.get(f"/api/posts?sort=relevance&cursor={cursor}").status_code == 400
+    assert client.get("/api/posts?sort=popular").status_code == 400
@@ -0,0 +1,29 @@
+"""Tests for the MinHash signatures behind near-duplicate detection."""
+
+from __future__ import annotations
+
+import hashlib
+
+from bluesea_app.services import similarity
+from bluesea_app.services.similarity import estimate_similarity, post_signature
+
+
+def test_word_values_match_exact_integer_arithmetic():
+    words = ["reef", "whale", "Ωcean", "a" * 200]
+
+    values = similarity._word_values(words)
+
+    for row, word in zip(values.tolist(), words):
+        x = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+        assert row == [(a * x + b) % similarity._PRIME for a, b in similarity._PERMUTATIONS]
+
+
+def test_similar_posts_have_similar_signatures():
+    body = "Humpback whales breached twice near the outer reef before heading north"
+    first = post_signature("Whale sighting", body)
+    second = post_signature("Whale sighting", body + " again")
+    other = post_signature("Harbour closure", "The marina stays shut for dredging until spring")
+
+    assert estimate_similarity(first.packed, second.packed) >= 0.7
+    assert estimate_similarity(first.packed, other.packed) < 0.3
+    assert post_signature("", "  ") is None
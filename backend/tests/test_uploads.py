@@ -0,0 +1,44 @@
+"""Tests for serving uploaded files."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+_DIGEST = "ab" * 32
+_NAME = f"ab/ab/{_DIGEST}.png"
+
+
+@pytest.fixture()
+def stored_upload(app):
+    path = os.path.join(app.config["UPLOAD_FOLDER"], _NAME)
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as handle:
+        handle.write(b"\x89PNG\r\n\x1a\n" + b"0" * 64)
+    return path
+
+
+def test_uploads_are_served_with_a_revalidatable_etag(client, stored_upload):
+    response = client.get(f"/uploads/{_NAME}")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["Cache-Control"]
+
+    revalidated = client.get(f"/uploads/{_NAME}", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+@pytest.mark.parametrize("offload, header", [("x-accel", "X-Accel-Redirect"), ("x-sendfile", "X-Sendfile")])
+def test_offloaded_uploads_are_conditional(app, client, stored_upload, offload, header):
+    app.config["UPLOADS_OFFLOAD"] = offload
+
+    response = client.get(f"/uploads/{_NAME}")
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{_DIGEST}"'
+    assert header in response.headers
+    assert response.data == b""
+
+    revalidated = client.get(f"/uploads/{_NAME}", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert header not in revalidated.headers
+    assert "immutable" in revalidated.headers["Cache-Control"]
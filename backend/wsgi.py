@@ -1,4 +1,13 @@
-"""WSGI entry point for running the BlueSea backend."""
+"""WSGI entry point for running the BlueSea backend.
+
+In production, serve it with gunicorn and the bundled configuration::
+
+    flask --app bluesea_app:create_app init-db
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+``create_app`` has no side effects on the database or filesystem, so the
+app can be imported once in the gunicorn master and shared by forked workers.
+"""
 
 from bluesea_app import create_app
 